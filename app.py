@@ -4,25 +4,235 @@
 
 import streamlit as st
 import asyncio
-import json
+import orjson
 import os
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from dataclasses import dataclass, asdict
-import requests
-import time
+from typing import Dict, List, Optional, Any, Tuple, AsyncIterator, Callable
+from dataclasses import dataclass, field
+import httpx
 import re
 from urllib.parse import urlparse
+from pathlib import Path
+import functools
+import io
+import itertools
+import uuid
+import random
+import hashlib
+import sys
 import logging
 
 # Configurazione logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@dataclass
+def _dumps(obj: Any, option: int = 0) -> str:
+    """Serializza in JSON tramite orjson"""
+    return orjson.dumps(obj, option=option | orjson.OPT_NON_STR_KEYS).decode()
+
+_loads = orjson.loads
+
+# Durata cache (secondi) delle risposte delle API esterne
+SEMRUSH_CACHE_TTL = 24 * 3600
+SERPER_CACHE_TTL = 3600
+REPORT_CACHE_TTL = 24 * 3600
+
+# Richieste OpenAI simultanee massime e tentativi in caso di rate limit (429)
+OPENAI_MAX_CONCURRENT_REQUESTS = 10
+OPENAI_RATE_LIMIT_RETRIES = 5
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Legge l'attesa suggerita dagli header della risposta 429"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    
+    return None
+
+def _retry_on_rate_limit(max_retries: int = OPENAI_RATE_LIMIT_RETRIES, base_delay: float = 1.0):
+    """Ripete la chiamata OpenAI in caso di rate limit con backoff esponenziale e jitter"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            import openai
+            
+            for attempt in range(max_retries + 1):
+                try:
+                    return await func(*args, **kwargs)
+                except openai.RateLimitError as e:
+                    if attempt == max_retries:
+                        raise
+                    
+                    delay = _retry_after_seconds(e) or base_delay * 2 ** attempt
+                    delay += random.uniform(0, delay / 4)
+                    logger.warning(f"Rate limit OpenAI, nuovo tentativo tra {delay:.1f}s")
+                    await asyncio.sleep(delay)
+        
+        return wrapper
+    return decorator
+
+# Piattaforme social cercate e relativo dominio
+SOCIAL_PLATFORM_DOMAINS = {
+    "instagram": "instagram.com",
+    "facebook": "facebook.com",
+    "linkedin": "linkedin.com",
+    "youtube": "youtube.com",
+    "tiktok": "tiktok.com"
+}
+
+# Snapshot su disco dei risultati, per riprendere analisi interrotte
+RESULTS_CACHE_DIR = Path(".cache")
+# Età massima (secondi) di uno snapshot riutilizzabile, come per la cache SEMRush
+SNAPSHOT_MAX_AGE = SEMRUSH_CACHE_TTL
+
+# Candidati competitor (domini unici) inviati all'analisi OpenAI
+MAX_COMPETITOR_CANDIDATES = 20
+
+# Partita IVA: 11 cifre consecutive
+_PIVA_RE = re.compile(r'\d{11}')
+
+# Dati grezzi esclusi dal payload del report finale
+REPORT_RAW_KEYS = frozenset({"semrush_raw", "search_results", "social_profiles", "financial_raw_data"})
+
+# Ruoli e istruzioni degli agenti: costanti di modulo, già senza indentazione
+_SEMRUSH_ROLE = sys.intern("Sei un esperto analista SEO e digital marketing specializzato nell'interpretazione di dati SEMRush.")
+_SEMRUSH_INSTRUCTIONS = """\
+Analizza i dati SEMRush forniti e estrai:
+1. Traffico organico e keyword posizionate
+2. Backlinks e domini referenti
+3. Competitor principali
+4. Trend di crescita/decrescita
+5. Opportunità SEO identificate
+
+Struttura la risposta in JSON con le seguenti chiavi:
+- traffico_organico
+- keywords_organiche
+- backlinks
+- domini_referenti
+- competitors
+- trend_analisi
+- raccomandazioni"""
+
+_SERPER_ROLE = sys.intern("Sei un esperto ricercatore di mercato specializzato nell'identificazione e analisi di competitor.")
+_SERPER_INSTRUCTIONS = """\
+Analizza i risultati di ricerca per identificare competitor e raccogliere informazioni su:
+1. Nome azienda e ragione sociale
+2. Sito web principale
+3. Servizi e prodotti principali
+4. Presenza geografica
+5. Informazioni di contatto disponibili
+
+Struttura la risposta in JSON con array di competitor, ognuno con:
+- nome_azienda
+- sito_web
+- descrizione_business
+- servizi_principali
+- area_geografica"""
+
+_SOCIAL_ROLE = sys.intern("Sei un esperto analista di social media marketing.")
+_SOCIAL_INSTRUCTIONS = """\
+Analizza i dati dei social media e estrai:
+1. Follower/fan count per piattaforma
+2. Engagement rate medio
+3. Frequenza di posting
+4. Tipo di contenuti pubblicati
+5. Performance dei post più popolari
+
+Struttura la risposta in JSON per ogni piattaforma:
+- platform
+- follower_count
+- engagement_rate
+- posting_frequency
+- content_types
+- performance_insights"""
+
+_FINANCIAL_ROLE = sys.intern("Sei un esperto analista finanziario specializzato nell'interpretazione di bilanci aziendali.")
+_FINANCIAL_INSTRUCTIONS = """\
+Analizza i dati finanziari e societari per estrarre:
+1. Fatturato degli ultimi anni disponibili
+2. Crescita anno su anno (%)
+3. Patrimonio netto e capitale sociale
+4. Numero dipendenti e costo del personale
+5. Indicatori di solidità finanziaria
+
+Struttura la risposta in JSON con:
+- fatturato_evolution
+- growth_rates
+- financial_indicators
+- employee_data
+- financial_health_assessment"""
+
+_REPORT_ROLE = sys.intern("Sei un esperto consulente di business intelligence e marketing strategico.")
+_REPORT_INSTRUCTIONS = """\
+Crea un report completo e professionale che includa:
+1. Executive Summary con key insights
+2. Analisi dettagliata per ogni sezione
+3. Analisi SWOT
+4. Raccomandazioni strategiche actionable
+5. Conclusioni e next steps
+
+Il report deve essere strutturato, professionale e orientato all'azione."""
+
+class ResponseCache:
+    """Cache Redis per le risposte delle API esterne"""
+    
+    def __init__(self, client=None):
+        # Senza client Redis la cache è disattivata
+        self.client = client
+    
+    @classmethod
+    def from_url(cls, redis_url: str) -> "ResponseCache":
+        """Crea la cache collegata all'istanza Redis indicata"""
+        try:
+            import redis.asyncio as redis
+            return cls(redis.from_url(redis_url))
+        except ImportError:
+            logger.warning("Pacchetto redis non installato: cache disattivata")
+        except Exception as e:
+            logger.warning(f"Errore configurazione Redis: {e}")
+        return cls()
+    
+    async def get(self, key: str) -> Optional[Any]:
+        """Recupera un valore dalla cache"""
+        if not self.client:
+            return None
+        
+        try:
+            cached = await self.client.get(key)
+        except Exception as e:
+            logger.warning(f"Errore lettura cache Redis: {e}")
+            return None
+        
+        if cached is None:
+            return None
+        
+        logger.info(f"Cache hit per chiave: {key[:40]}")
+        return _loads(cached)
+    
+    async def set(self, key: str, value: Any, ttl: int):
+        """Salva un valore in cache con scadenza"""
+        if not self.client:
+            return
+        
+        try:
+            await self.client.set(key, orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS), ex=ttl)
+        except Exception as e:
+            logger.warning(f"Errore scrittura cache Redis: {e}")
+    
+    async def aclose(self):
+        """Chiude il pool di connessioni Redis"""
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+
+@dataclass(slots=True)
 class CompanyData:
     """Struttura dati per le informazioni aziendali"""
     # Profilo aziendale
@@ -34,7 +244,7 @@ class CompanyData:
     descrizione: str = ""
     
     # Dati finanziari
-    fatturato_anni: Dict[str, float] = None
+    fatturato_anni: Dict[str, float] = field(default_factory=dict)
     patrimonio_netto: float = 0
     capitale_sociale: float = 0
     totale_attivo: float = 0
@@ -48,101 +258,121 @@ class CompanyData:
     domini_referenti: int = 0
     
     # Social media
-    social_profiles: Dict[str, Dict] = None
+    social_profiles: Dict[str, Dict] = field(default_factory=dict)
     
     # Competitors
-    competitors: List[str] = None
-    
-    def __post_init__(self):
-        if self.fatturato_anni is None:
-            self.fatturato_anni = {}
-        if self.social_profiles is None:
-            self.social_profiles = {}
-        if self.competitors is None:
-            self.competitors = []
+    competitors: List[str] = field(default_factory=list)
 
 class OpenAIAgent:
     """Classe base per gli agenti AI"""
     
-    def __init__(self, api_key: str, role: str, instructions: str):
-        self.api_key = api_key
+    def __init__(self, client, role: str, instructions: str, model: str = "gpt-4o-mini"):
+        # Client AsyncOpenAI condiviso tra tutti gli agenti
+        self.client = client
+        # Limite alle richieste OpenAI simultanee, condiviso da BusinessAnalyzer
+        self.semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENT_REQUESTS)
         self.role = role
         self.instructions = instructions
-        self.client = None
-        
-    def setup_client(self):
-        """Configura il client OpenAI"""
+        # Parte fissa del prompt, composta una sola volta per agente
+        self._prompt_prefix = f"{instructions}\n\nContesto: "
+        self.model = model
+        # In modalità batch le richieste vengono restituite invece che eseguite
+        self.batch_mode = False
+        self.cache = ResponseCache()
+        # Client HTTP condiviso, assegnato da BusinessAnalyzer
+        self.http = None
+    
+    def _request_body(self, prompt: str) -> Dict[str, Any]:
+        """Costruisce il corpo della richiesta chat completions"""
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self.role},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.1,
+            "response_format": {"type": "json_object"}
+        }
+    
+    @_retry_on_rate_limit()
+    async def _create_completion(self, **request):
+        """Invia la richiesta chat completions rispettando il limite di concorrenza"""
+        # Retry dell'SDK disattivati: l'unico backoff è quello del decoratore,
+        # che attende fuori dal semaforo senza occupare uno slot
+        async with self.semaphore:
+            return await self.client.with_options(max_retries=0).chat.completions.create(**request)
+    
+    @_retry_on_rate_limit()
+    async def _open_stream(self, **request):
+        """Apre una risposta in streaming occupando uno slot del semaforo, rilasciato dal chiamante"""
+        await self.semaphore.acquire()
         try:
-            import openai
-            self.client = openai.OpenAI(api_key=self.api_key)
-            return True
-        except Exception as e:
-            logger.error(f"Errore configurazione OpenAI: {e}")
-            return False
+            return await self.client.with_options(max_retries=0).chat.completions.create(
+                **request, stream=True
+            )
+        except BaseException:
+            # Richiesta fallita: lo slot si libera prima dell'eventuale attesa del retry
+            self.semaphore.release()
+            raise
+    
+    def _parse_response(self, result: str) -> Dict[str, Any]:
+        """Converte la risposta JSON del modello in dizionario"""
+        return _loads(result)
+    
+    def _build_prompt(self, data: str, context: str = "") -> str:
+        """Compone il prompt utente"""
+        return (
+            f"{self._prompt_prefix}{context}\n\n"
+            f"Dati da analizzare:\n{data}\n\n"
+            "Fornisci una risposta strutturata in formato JSON."
+        )
     
     async def analyze(self, data: str, context: str = "") -> Dict[str, Any]:
         """Analizza i dati utilizzando OpenAI"""
-        if not self.client:
-            if not self.setup_client():
-                return {"error": "Impossibile configurare OpenAI client"}
+        prompt = self._build_prompt(data, context)
+        
+        if self.batch_mode:
+            # Richiesta da inviare tramite OpenAI Batch API
+            return {
+                "custom_id": f"{type(self).__name__}-{uuid.uuid4().hex}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._request_body(prompt)
+            }
         
         try:
-            prompt = f"""
-            {self.instructions}
-            
-            Contesto: {context}
+            response = await self._create_completion(**self._request_body(prompt))
             
-            Dati da analizzare:
-            {data}
-            
-            Fornisci una risposta strutturata in formato JSON.
-            """
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": self.role},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1
-            )
-            
-            result = response.choices[0].message.content
-            
-            # Prova a parsare come JSON
-            try:
-                return json.loads(result)
-            except:
-                return {"raw_response": result}
+            return self._parse_response(response.choices[0].message.content)
                 
         except Exception as e:
             logger.error(f"Errore analisi OpenAI: {e}")
             return {"error": str(e)}
+    
+    async def analyze_stream(self, data: str, context: str = "") -> AsyncIterator[str]:
+        """Analizza i dati con OpenAI restituendo il testo generato man mano che arriva"""
+        stream = await self._open_stream(**self._request_body(self._build_prompt(data, context)))
+        
+        # Lo slot resta occupato finché lo stream non è stato letto per intero
+        try:
+            text = ""
+            async for chunk in stream:
+                if chunk.choices:
+                    text += chunk.choices[0].delta.content or ""
+                    yield text
+        finally:
+            self.semaphore.release()
+            await stream.close()
 
 class SEMRushAgent(OpenAIAgent):
     """Agente specializzato per analisi SEMRush"""
     
-    def __init__(self, api_key: str, semrush_api_key: str):
+    def __init__(self, client, semrush_api_key: str, model: str = "gpt-4o-mini"):
         super().__init__(
-            api_key=api_key,
-            role="Sei un esperto analista SEO e digital marketing specializzato nell'interpretazione di dati SEMRush.",
-            instructions="""
-            Analizza i dati SEMRush forniti e estrai:
-            1. Traffico organico e keyword posizionate
-            2. Backlinks e domini referenti
-            3. Competitor principali
-            4. Trend di crescita/decrescita
-            5. Opportunità SEO identificate
-            
-            Struttura la risposta in JSON con le seguenti chiavi:
-            - traffico_organico
-            - keywords_organiche
-            - backlinks
-            - domini_referenti
-            - competitors
-            - trend_analisi
-            - raccomandazioni
-            """
+            client=client,
+            model=model,
+            role=_SEMRUSH_ROLE,
+            instructions=_SEMRUSH_INSTRUCTIONS
         )
         self.semrush_api_key = semrush_api_key
     
@@ -158,6 +388,22 @@ class SEMRushAgent(OpenAIAgent):
         
         return None
     
+    async def _fetch_report(self, base_url: str, params: Dict[str, Any]) -> Optional[str]:
+        """Recupera un singolo report SEMRush"""
+        cache_key = f"semrush:{params['type']}:{params['domain']}"
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        response = await self.http.get(base_url, params=params)
+        if response.status_code == 200:
+            report = response.text
+            # Errori SEMRush (chiave, crediti esauriti...) arrivano con status 200: non vanno in cache
+            if not report.startswith("ERROR"):
+                await self.cache.set(cache_key, report, SEMRUSH_CACHE_TTL)
+            return report
+        return None
+    
     async def fetch_semrush_data(self, domain: str) -> Dict[str, Any]:
         """Recupera dati da SEMRush API"""
         if not domain:
@@ -168,40 +414,62 @@ class SEMRushAgent(OpenAIAgent):
         
         # Parametri base
         params = {
-            "type": "domain_organic",
             "key": self.semrush_api_key,
             "display_limit": 50,
             "export_columns": "Dn,Cr,Np,Or,Ot,Oc,Ad,At,Ac",
             "domain": domain
         }
         
+        # Dati organici, backlinks e competitor richiesti in parallelo
+        report_params = {
+            "organic": {**params, "type": "domain_organic"},
+            "backlinks": {**params, "type": "backlinks_overview"},
+            "competitors": {**params, "type": "domain_organic_organic", "display_limit": 20}
+        }
+        
+        responses = await asyncio.gather(
+            *(self._fetch_report(base_url, p) for p in report_params.values()),
+            return_exceptions=True
+        )
+        
+        errors = []
+        for report_name, response in zip(report_params, responses):
+            if isinstance(response, Exception):
+                logger.error(f"Errore recupero dati SEMRush ({report_name}): {response}")
+                errors.append(response)
+            elif response is not None:
+                report = self._parse_report(report_name, response)
+                if report is not None:
+                    semrush_data[report_name] = report
+        
+        if errors and len(errors) == len(report_params):
+            return {"error": str(errors[0])}
+        
+        return semrush_data
+    
+    def _parse_report(self, report_name: str, report: str) -> Optional[Any]:
+        """Converte un report CSV SEMRush (separatore ';') in dati strutturati"""
+        # SEMRush restituisce errori come testo semplice (es. "ERROR 50 :: NOTHING FOUND")
+        if report.startswith("ERROR"):
+            logger.warning(f"SEMRush ({report_name}): {report.strip()}")
+            return None
+        
+        # pandas è pesante da importare: caricato solo quando serve
+        import pandas as pd
+        
         try:
-            # 1. Dati organici
-            response = requests.get(base_url, params=params, timeout=30)
-            if response.status_code == 200:
-                organic_data = response.text
-                semrush_data["organic"] = organic_data
-            
-            # 2. Backlinks
-            params["type"] = "backlinks_overview"
-            response = requests.get(base_url, params=params, timeout=30)
-            if response.status_code == 200:
-                backlinks_data = response.text
-                semrush_data["backlinks"] = backlinks_data
-            
-            # 3. Competitor
-            params["type"] = "domain_organic_organic"
-            params["display_limit"] = 20
-            response = requests.get(base_url, params=params, timeout=30)
-            if response.status_code == 200:
-                competitors_data = response.text
-                semrush_data["competitors"] = competitors_data
-            
-            return semrush_data
-            
-        except Exception as e:
-            logger.error(f"Errore recupero dati SEMRush: {e}")
-            return {"error": str(e)}
+            df = pd.read_csv(io.StringIO(report), sep=";")
+        except (pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+            logger.error(f"Errore parsing report SEMRush ({report_name}): {e}")
+            return None
+        
+        if df.empty:
+            return None
+        
+        # I competitor sono una riga per dominio, gli altri report una riga di metriche
+        if report_name == "competitors":
+            return df.to_dict(orient="records")
+        return df.iloc[0].to_dict()
     
     async def analyze_company(self, user_input: str) -> Dict[str, Any]:
         """Analizza un'azienda utilizzando SEMRush"""
@@ -218,7 +486,7 @@ class SEMRushAgent(OpenAIAgent):
         
         # Analizza con OpenAI
         context = f"Analisi SEMRush per il dominio: {domain}"
-        analysis = await self.analyze(json.dumps(semrush_data), context)
+        analysis = await self.analyze(_dumps(semrush_data), context)
         
         return {
             "domain": domain,
@@ -229,27 +497,54 @@ class SEMRushAgent(OpenAIAgent):
 class SerperAgent(OpenAIAgent):
     """Agente per ricerca competitor con Serper.dev"""
     
-    def __init__(self, api_key: str, serper_api_key: str):
+    def __init__(self, client, serper_api_key: str, max_concurrent_searches: int = 5,
+                 model: str = "gpt-4o-mini"):
         super().__init__(
-            api_key=api_key,
-            role="Sei un esperto ricercatore di mercato specializzato nell'identificazione e analisi di competitor.",
-            instructions="""
-            Analizza i risultati di ricerca per identificare competitor e raccogliere informazioni su:
-            1. Nome azienda e ragione sociale
-            2. Sito web principale
-            3. Servizi e prodotti principali
-            4. Presenza geografica
-            5. Informazioni di contatto disponibili
-            
-            Struttura la risposta in JSON con array di competitor, ognuno con:
-            - nome_azienda
-            - sito_web
-            - descrizione_business
-            - servizi_principali
-            - area_geografica
-            """
+            client=client,
+            model=model,
+            role=_SERPER_ROLE,
+            instructions=_SERPER_INSTRUCTIONS
         )
         self.serper_api_key = serper_api_key
+        # Rate limiting: numero massimo di richieste Serper simultanee
+        self._search_semaphore = asyncio.Semaphore(max_concurrent_searches)
+    
+    async def search(self, query: str, num: int = 20) -> Optional[Dict[str, Any]]:
+        """Esegue una singola ricerca su Serper.dev"""
+        cache_key = f"serper:{num}:{query}"
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        url = "https://google.serper.dev/search"
+        payload = _dumps({
+            "q": query,
+            "gl": "it",
+            "hl": "it",
+            "num": num
+        })
+        headers = {
+            'X-API-KEY': self.serper_api_key,
+            'Content-Type': 'application/json'
+        }
+        
+        try:
+            async with self._search_semaphore:
+                response = await self.http.post(url, headers=headers, content=payload)
+            
+            if response.status_code == 200:
+                # orjson legge direttamente i bytes della risposta, senza decodifica intermedia
+                results = _loads(response.content)
+                search_result = {
+                    "query": query,
+                    "results": results
+                }
+                await self.cache.set(cache_key, search_result, SERPER_CACHE_TTL)
+                return search_result
+        except Exception as e:
+            logger.error(f"Errore ricerca Serper: {e}")
+        
+        return None
     
     async def search_competitors(self, company_name: str, sector: str = "") -> Dict[str, Any]:
         """Cerca competitor utilizzando Serper.dev"""
@@ -260,87 +555,62 @@ class SerperAgent(OpenAIAgent):
             f"{sector} aziende italiane" if sector else f"{company_name} simili aziende"
         ]
         
-        all_results = []
+        responses = await asyncio.gather(*(self.search(query) for query in search_queries))
+        all_results = [response for response in responses if response]
         
-        for query in search_queries:
-            try:
-                url = "https://google.serper.dev/search"
-                payload = json.dumps({
-                    "q": query,
-                    "gl": "it",
-                    "hl": "it",
-                    "num": 20
-                })
-                headers = {
-                    'X-API-KEY': self.serper_api_key,
-                    'Content-Type': 'application/json'
-                }
-                
-                response = requests.post(url, headers=headers, data=payload, timeout=30)
-                
-                if response.status_code == 200:
-                    results = response.json()
-                    all_results.append({
-                        "query": query,
-                        "results": results
-                    })
-                
-                time.sleep(1)  # Rate limiting
-                
-            except Exception as e:
-                logger.error(f"Errore ricerca Serper: {e}")
-        
-        # Analizza risultati con OpenAI
+        # Analizza con OpenAI solo i candidati unici, non i risultati sovrapposti delle tre query
+        candidates = self._unique_candidates(all_results)
         context = f"Ricerca competitor per: {company_name}"
-        analysis = await self.analyze(json.dumps(all_results), context)
+        analysis = await self.analyze(_dumps(candidates), context)
         
         return {
             "search_results": all_results,
             "competitor_analysis": analysis
         }
+    
+    def _unique_candidates(self, all_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Risultati organici deduplicati per dominio, nell'ordine di rilevanza"""
+        candidates = {}
+        for search_result in all_results:
+            for result in search_result["results"].get("organic", []):
+                link = result.get("link", "")
+                domain = urlparse(link).netloc.removeprefix("www.")
+                if domain and domain not in candidates:
+                    candidates[domain] = {
+                        "title": result.get("title", ""),
+                        "link": link,
+                        "snippet": result.get("snippet", "")
+                    }
+        
+        return list(itertools.islice(candidates.values(), MAX_COMPETITOR_CANDIDATES))
 
 class SocialMediaAgent(OpenAIAgent):
     """Agente per analisi social media"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, client, searcher: "SerperAgent", model: str = "gpt-4o-mini"):
         super().__init__(
-            api_key=api_key,
-            role="Sei un esperto analista di social media marketing.",
-            instructions="""
-            Analizza i dati dei social media e estrai:
-            1. Follower/fan count per piattaforma
-            2. Engagement rate medio
-            3. Frequenza di posting
-            4. Tipo di contenuti pubblicati
-            5. Performance dei post più popolari
-            
-            Struttura la risposta in JSON per ogni piattaforma:
-            - platform
-            - follower_count
-            - engagement_rate
-            - posting_frequency
-            - content_types
-            - performance_insights
-            """
+            client=client,
+            model=model,
+            role=_SOCIAL_ROLE,
+            instructions=_SOCIAL_INSTRUCTIONS
         )
+        # Ricerche Serper condivise con l'agente competitor (stessa cache e rate limit)
+        self.searcher = searcher
     
     async def find_social_profiles(self, company_name: str, website: str = "") -> Dict[str, Any]:
         """Trova e analizza profili social dell'azienda"""
         
-        # Implementazione semplificata - in produzione si potrebbero usare API specifiche
-        platforms = ["instagram", "facebook", "linkedin", "youtube", "tiktok"]
-        social_data = {}
+        platforms = list(SOCIAL_PLATFORM_DOMAINS)
         
-        for platform in platforms:
-            # Simula ricerca profili social
-            # In produzione, implementare ricerca via Serper o API specifiche
-            profile_data = await self._search_platform_profile(company_name, platform, website)
-            if profile_data:
-                social_data[platform] = profile_data
+        # Una ricerca per piattaforma, eseguite in parallelo
+        profiles = await asyncio.gather(
+            *(self._search_platform_profile(company_name, platform, website) for platform in platforms)
+        )
+        social_data = {platform: profile for platform, profile in zip(platforms, profiles) if profile}
         
         # Analizza con OpenAI
         context = f"Analisi profili social per: {company_name}"
-        analysis = await self.analyze(json.dumps(social_data), context)
+        analysis = await self.analyze(_dumps(social_data), context)
         
         return {
             "social_profiles": social_data,
@@ -349,12 +619,32 @@ class SocialMediaAgent(OpenAIAgent):
     
     async def _search_platform_profile(self, company_name: str, platform: str, website: str) -> Dict[str, Any]:
         """Cerca profilo specifico su una piattaforma"""
-        # Implementazione placeholder
-        # In produzione, implementare ricerca effettiva
+        platform_domain = SOCIAL_PLATFORM_DOMAINS[platform]
+        search = await self.searcher.search(f'site:{platform_domain} "{company_name}"', num=5)
+        
+        organic_results = (search or {}).get("results", {}).get("organic", [])
+        profile = next(
+            (result for result in organic_results if platform_domain in result.get("link", "")),
+            None
+        )
+        
+        if not profile:
+            return {
+                "platform": platform,
+                "profile_url": "",
+                "found": False,
+                "followers": 0,
+                "posts": 0
+            }
+        
+        # Follower e post non sono esposti da Serper: titolo e snippet li riportano
+        # spesso e vengono interpretati dall'analisi OpenAI
         return {
             "platform": platform,
-            "profile_url": f"https://{platform}.com/{company_name.lower().replace(' ', '')}",
-            "found": False,
+            "profile_url": profile["link"],
+            "title": profile.get("title", ""),
+            "snippet": profile.get("snippet", ""),
+            "found": True,
             "followers": 0,
             "posts": 0
         }
@@ -362,25 +652,12 @@ class SocialMediaAgent(OpenAIAgent):
 class FinancialAgent(OpenAIAgent):
     """Agente per analisi dati finanziari"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, client, model: str = "gpt-4o-mini"):
         super().__init__(
-            api_key=api_key,
-            role="Sei un esperto analista finanziario specializzato nell'interpretazione di bilanci aziendali.",
-            instructions="""
-            Analizza i dati finanziari e societari per estrarre:
-            1. Fatturato degli ultimi anni disponibili
-            2. Crescita anno su anno (%)
-            3. Patrimonio netto e capitale sociale
-            4. Numero dipendenti e costo del personale
-            5. Indicatori di solidità finanziaria
-            
-            Struttura la risposta in JSON con:
-            - fatturato_evolution
-            - growth_rates
-            - financial_indicators
-            - employee_data
-            - financial_health_assessment
-            """
+            client=client,
+            model=model,
+            role=_FINANCIAL_ROLE,
+            instructions=_FINANCIAL_INSTRUCTIONS
         )
     
     async def analyze_financial_data(self, partita_iva: str, company_name: str) -> Dict[str, Any]:
@@ -391,7 +668,7 @@ class FinancialAgent(OpenAIAgent):
         
         # Analizza con OpenAI
         context = f"Analisi finanziaria per: {company_name} (P.IVA: {partita_iva})"
-        analysis = await self.analyze(json.dumps(financial_data), context)
+        analysis = await self.analyze(_dumps(financial_data), context)
         
         return {
             "financial_raw_data": financial_data,
@@ -416,88 +693,158 @@ class FinancialAgent(OpenAIAgent):
 class ReportAgent(OpenAIAgent):
     """Agente per generazione report finale"""
     
-    def __init__(self, api_key: str):
-        super().__init__(
-            api_key=api_key,
-            role="Sei un esperto consulente di business intelligence e marketing strategico.",
-            instructions="""
-            Crea un report completo e professionale che includa:
-            1. Executive Summary con key insights
-            2. Analisi dettagliata per ogni sezione
-            3. Analisi SWOT
-            4. Raccomandazioni strategiche actionable
-            5. Conclusioni e next steps
-            
-            Il report deve essere strutturato, professionale e orientato all'azione.
-            """
-        )
-    
-    async def generate_comprehensive_report(self, all_data: Dict[str, Any]) -> str:
-        """Genera report comprensivo basato su tutti i dati raccolti"""
-        
-        context = "Generazione report business intelligence completo"
-        report_data = json.dumps(all_data, indent=2, ensure_ascii=False)
-        
-        analysis = await self.analyze(report_data, context)
-        
-        # Genera report strutturato
-        report = self._format_report(analysis, all_data)
-        
-        return report
-    
-    def _format_report(self, analysis: Dict[str, Any], raw_data: Dict[str, Any]) -> str:
-        """Formatta il report finale"""
-        
-        current_date = datetime.now().strftime("%d/%m/%Y")
-        
-        report = f"""
+    # Struttura markdown del report finale
+    _TEMPLATE = """
 # BUSINESS INTELLIGENCE REPORT
-## Data di generazione: {current_date}
+## Data di generazione: {date}
 
 ### EXECUTIVE SUMMARY
 
-{analysis.get('executive_summary', 'Analisi completa dei dati aziendali raccolti.')}
+{executive_summary}
 
 ### 1. PROFILO AZIENDALE
 
-**Nome Azienda:** {raw_data.get('company_name', 'N/A')}
-**Sito Web:** {raw_data.get('website', 'N/A')}
-**Settore:** {analysis.get('sector', 'N/A')}
+**Nome Azienda:** {company_name}
+**Sito Web:** {website}
+**Settore:** {sector}
 
 ### 2. ANALISI DIGITALE E SEO
 
-{self._format_seo_section(raw_data.get('semrush_data', {}))}
+{seo}
 
 ### 3. ANALISI COMPETITOR
 
-{self._format_competitor_section(raw_data.get('competitor_data', {}))}
+{competitors}
 
 ### 4. PRESENZA SOCIAL MEDIA
 
-{self._format_social_section(raw_data.get('social_data', {}))}
+{social}
 
 ### 5. DATI FINANZIARI
 
-{self._format_financial_section(raw_data.get('financial_data', {}))}
+{financial}
 
 ### 6. ANALISI SWOT
 
-{analysis.get('swot_analysis', 'Analisi SWOT da completare con dati aggiuntivi.')}
+{swot}
 
 ### 7. RACCOMANDAZIONI STRATEGICHE
 
-{analysis.get('strategic_recommendations', 'Raccomandazioni da definire in base ai risultati dell\'analisi.')}
+{recommendations}
 
 ### 8. CONCLUSIONI
 
-{analysis.get('conclusions', 'Report generato automaticamente dal sistema di Business Intelligence.')}
+{conclusions}
 
 ---
 *Report generato automaticamente da Business Intelligence Analyzer*
-        """
+"""
+    
+    def __init__(self, client, model: str = "gpt-4o"):
+        super().__init__(
+            client=client,
+            model=model,
+            role=_REPORT_ROLE,
+            instructions=_REPORT_INSTRUCTIONS
+        )
+    
+    def prepare_report_input(self, all_data: Dict[str, Any]) -> Tuple[str, str]:
+        """Prepara dati e contesto da inviare al modello"""
+        context = "Generazione report business intelligence completo"
+        
+        # Solo le analisi già elaborate: i dati grezzi restano fuori dal prompt
+        summary_payload = {
+            "company_name": all_data.get("company_name", ""),
+            "website": all_data.get("website", ""),
+            "analysis_results": {
+                stage: {k: v for k, v in stage_result.items() if k not in REPORT_RAW_KEYS}
+                for stage, stage_result in all_data.get("analysis_results", {}).items()
+            }
+        }
+        report_data = _dumps(summary_payload)
+        
+        return report_data, context
+    
+    def _report_cache_key(self, all_data: Dict[str, Any]) -> str:
+        """Chiave cache del report basata sui soli dati grezzi delle API esterne"""
+        # Le analisi dei passi cambiano a ogni esecuzione (output del modello):
+        # stessi dati esterni producono lo stesso report
+        raw_payload = {
+            "company_name": all_data.get("company_name", ""),
+            "website": all_data.get("website", ""),
+            "raw_data": {
+                stage: {k: v for k, v in stage_result.items() if k in REPORT_RAW_KEYS}
+                for stage, stage_result in all_data.get("analysis_results", {}).items()
+            }
+        }
+        raw_json = orjson.dumps(raw_payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        return "report:" + hashlib.sha256(raw_json).hexdigest()
+    
+    async def _analyze_streaming(self, report_data: str, context: str,
+                                 on_partial: Callable[[str], None]) -> Dict[str, Any]:
+        """Genera l'analisi in streaming notificando il testo parziale"""
+        partial = ""
+        try:
+            async for partial in self.analyze_stream(report_data, context):
+                on_partial(partial)
+            
+            return self._parse_response(partial)
+            
+        except Exception as e:
+            logger.error(f"Errore analisi OpenAI in streaming: {e}")
+            return {"error": str(e)}
+    
+    async def generate_comprehensive_report(self, all_data: Dict[str, Any],
+                                            analysis: Optional[Dict[str, Any]] = None,
+                                            on_partial: Optional[Callable[[str], None]] = None) -> str:
+        """Genera report comprensivo basato su tutti i dati raccolti"""
+        
+        # L'analisi può essere già disponibile (es. ottenuta in modalità batch)
+        if analysis is None:
+            report_data, context = self.prepare_report_input(all_data)
+            
+            cache_key = self._report_cache_key(all_data)
+            
+            analysis = await self.cache.get(cache_key)
+            if analysis is None:
+                if on_partial:
+                    analysis = await self._analyze_streaming(report_data, context, on_partial)
+                else:
+                    analysis = await self.analyze(report_data, context)
+                if "error" not in analysis:
+                    await self.cache.set(cache_key, analysis, REPORT_CACHE_TTL)
+        
+        # Genera report strutturato
+        report = self._format_report(analysis, all_data)
         
         return report
     
+    def _format_report(self, analysis: Dict[str, Any], raw_data: Dict[str, Any]) -> str:
+        """Formatta il report finale"""
+        
+        current_date = datetime.now().strftime("%d/%m/%Y")
+        
+        return self._TEMPLATE.format(
+            date=current_date,
+            executive_summary=analysis.get('executive_summary', 'Analisi completa dei dati aziendali raccolti.'),
+            company_name=raw_data.get('company_name', 'N/A'),
+            website=raw_data.get('website', 'N/A'),
+            sector=analysis.get('sector', 'N/A'),
+            seo=self._format_seo_section(raw_data.get('semrush_data', {})),
+            competitors=self._format_competitor_section(raw_data.get('competitor_data', {})),
+            social=self._format_social_section(raw_data.get('social_data', {})),
+            financial=self._format_financial_section(raw_data.get('financial_data', {})),
+            swot=analysis.get('swot_analysis', 'Analisi SWOT da completare con dati aggiuntivi.'),
+            recommendations=analysis.get(
+                'strategic_recommendations',
+                "Raccomandazioni da definire in base ai risultati dell'analisi."
+            ),
+            conclusions=analysis.get(
+                'conclusions',
+                'Report generato automaticamente dal sistema di Business Intelligence.'
+            )
+        )
+    
     def _format_seo_section(self, seo_data: Dict) -> str:
         """Formatta sezione SEO"""
         if not seo_data:
@@ -517,7 +864,7 @@ class ReportAgent(OpenAIAgent):
         
         competitors = competitor_data.get('competitors', [])
         if competitors:
-            competitor_list = "\n".join([f"- {comp}" for comp in competitors[:5]])
+            competitor_list = "\n".join(f"- {comp}" for comp in itertools.islice(competitors, 5))
             return f"**Principali Competitor Identificati:**\n{competitor_list}"
         
         return "Nessun competitor identificato."
@@ -545,7 +892,8 @@ class ReportAgent(OpenAIAgent):
 class BusinessAnalyzer:
     """Classe principale per l'analisi business"""
     
-    def __init__(self):
+    def __init__(self, batch_mode: bool = False, batch_poll_interval: float = 30.0,
+                 max_concurrent_requests: int = OPENAI_MAX_CONCURRENT_REQUESTS):
         self.openai_api_key = None
         self.semrush_api_key = None
         self.serper_api_key = None
@@ -556,21 +904,205 @@ class BusinessAnalyzer:
         self.social_agent = None
         self.financial_agent = None
         self.report_agent = None
+        
+        # Modalità batch: chiamate OpenAI raggruppate in un job Batch API
+        self.batch_mode = batch_mode
+        self.batch_poll_interval = batch_poll_interval
+        
+        # Client OpenAI unico condiviso da tutti gli agenti
+        self.openai_client = None
+        self.openai_semaphore = asyncio.Semaphore(max_concurrent_requests)
+        
+        self.cache = ResponseCache()
+        
+        # Client HTTP con connection pool condiviso da tutti gli agenti
+        self.http = None
     
-    def setup_agents(self, openai_key: str, semrush_key: str, serper_key: str):
+    def setup_agents(self, openai_key: str, semrush_key: str, serper_key: str,
+                     redis_url: Optional[str] = None):
         """Configura tutti gli agenti AI"""
         self.openai_api_key = openai_key
         self.semrush_api_key = semrush_key
         self.serper_api_key = serper_key
         
+        import openai
+        self.openai_client = openai.AsyncOpenAI(api_key=openai_key, max_retries=3)
+        
         # Inizializza agenti
-        self.semrush_agent = SEMRushAgent(openai_key, semrush_key)
-        self.serper_agent = SerperAgent(openai_key, serper_key)
-        self.social_agent = SocialMediaAgent(openai_key)
-        self.financial_agent = FinancialAgent(openai_key)
-        self.report_agent = ReportAgent(openai_key)
+        self.semrush_agent = SEMRushAgent(self.openai_client, semrush_key)
+        self.serper_agent = SerperAgent(self.openai_client, serper_key)
+        self.social_agent = SocialMediaAgent(self.openai_client, self.serper_agent)
+        self.financial_agent = FinancialAgent(self.openai_client)
+        self.report_agent = ReportAgent(self.openai_client)
+        
+        self.http = httpx.AsyncClient(
+            http2=True,
+            timeout=30,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
+        )
+        
+        # Cache Redis condivisa (opzionale)
+        if redis_url:
+            self.cache = ResponseCache.from_url(redis_url)
+        
+        for agent in self._agents():
+            agent.batch_mode = self.batch_mode
+            agent.cache = self.cache
+            agent.http = self.http
+            agent.semaphore = self.openai_semaphore
+    
+    def _agents(self) -> List[OpenAIAgent]:
+        """Restituisce tutti gli agenti configurati"""
+        return [
+            self.semrush_agent,
+            self.serper_agent,
+            self.social_agent,
+            self.financial_agent,
+            self.report_agent
+        ]
+    
+    async def _run_batch(self, requests: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Esegue le richieste tramite OpenAI Batch API e ne restituisce le risposte per custom_id"""
+        client = self.openai_client
+        batch_file = b"".join(orjson.dumps(request) + b"\n" for request in requests)
+        
+        uploaded = await client.files.create(file=("batch.jsonl", batch_file), purpose="batch")
+        batch = await client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        
+        while batch.status in ("validating", "in_progress", "finalizing"):
+            await asyncio.sleep(self.batch_poll_interval)
+            batch = await client.batches.retrieve(batch.id)
+        
+        responses = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = await client.files.content(file_id)
+            for line in content.content.splitlines():
+                if line.strip():
+                    item = _loads(line)
+                    responses[item["custom_id"]] = item
+        
+        if batch.status != "completed":
+            logger.error(f"Batch OpenAI {batch.id} terminato con stato: {batch.status}")
+        
+        return responses
+    
+    def _parse_batch_response(self, agent: OpenAIAgent, item: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Estrae l'analisi da una riga di output della Batch API"""
+        if not item:
+            return {"error": "Risposta batch non disponibile"}
+        
+        response = item.get("response") or {}
+        if item.get("error") or response.get("status_code") != 200:
+            return {"error": str(item.get("error") or response.get("body"))}
+        
+        try:
+            return agent._parse_response(response["body"]["choices"][0]["message"]["content"])
+        except (KeyError, IndexError, TypeError, orjson.JSONDecodeError) as e:
+            # Errore limitato a questo passo, come nel percorso non batch
+            logger.error(f"Risposta batch OpenAI non valida: {e}")
+            return {"error": f"Risposta batch non valida: {e}"}
+    
+    async def _resolve_batch_requests(self, analysis_results: Dict[str, Any]):
+        """Invia in un unico job le richieste in sospeso dei vari passi e ne inserisce le risposte"""
+        stage_agents = {
+            "semrush": self.semrush_agent,
+            "competitors": self.serper_agent,
+            "social": self.social_agent,
+            "financial": self.financial_agent
+        }
+        
+        pending = {}
+        for stage, stage_result in analysis_results.items():
+            for key, value in stage_result.items():
+                if isinstance(value, dict) and "custom_id" in value:
+                    pending[value["custom_id"]] = (stage_agents[stage], stage_result, key, value)
+        
+        if not pending:
+            return
+        
+        responses = await self._run_batch([request for *_, request in pending.values()])
+        
+        for custom_id, (agent, stage_result, key, _) in pending.items():
+            stage_result[key] = self._parse_batch_response(agent, responses.get(custom_id))
+    
+    async def aclose(self):
+        """Chiude i client HTTP, OpenAI e Redis condivisi"""
+        if self.http:
+            await self.http.aclose()
+        if self.openai_client:
+            await self.openai_client.close()
+        await self.cache.aclose()
+    
+    def _snapshot_path(self, user_input: str) -> Path:
+        """Percorso dello snapshot dei risultati per un dato input"""
+        run_id = hashlib.sha1(user_input.encode()).hexdigest()[:12]
+        return RESULTS_CACHE_DIR / f"{run_id}.json"
+    
+    def _load_snapshot(self, path: Path) -> Dict[str, Any]:
+        """Snapshot di un'analisi precedente non completata e non scaduta"""
+        try:
+            snapshot = _loads(path.read_bytes())
+        except FileNotFoundError:
+            return {}
+        except (OSError, orjson.JSONDecodeError) as e:
+            logger.warning(f"Snapshot {path} non leggibile: {e}")
+            return {}
+        
+        # Un'analisi già conclusa viene rieseguita da capo
+        if "final_report" in snapshot:
+            return {}
+        
+        # Dati troppo vecchi: l'analisi riparte da capo
+        try:
+            age = (datetime.now() - datetime.fromisoformat(snapshot["timestamp"])).total_seconds()
+        except (KeyError, TypeError, ValueError):
+            return {}
+        if age > SNAPSHOT_MAX_AGE:
+            return {}
+        return snapshot
+    
+    @staticmethod
+    def _stage_completed(stage_result: Dict[str, Any]) -> bool:
+        """Vero se il passo salvato non contiene errori né richieste batch ancora da inviare"""
+        if not stage_result or "error" in stage_result:
+            return False
+        return not any(
+            isinstance(value, dict) and ("custom_id" in value or "error" in value)
+            for value in stage_result.values()
+        )
     
-    async def analyze_company(self, user_input: str, progress_callback=None) -> Dict[str, Any]:
+    def _save_snapshot(self, path: Path, results: Dict[str, Any]):
+        """Salva i risultati su disco in modo atomico (file temporaneo + os.replace)"""
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_bytes(orjson.dumps(
+                results,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            ))
+            os.replace(tmp_path, path)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Impossibile salvare lo snapshot {path}: {e}")
+    
+    async def _run_stage(self, label: str, stage, progress_callback=None) -> Dict[str, Any]:
+        """Esegue un passo dell'analisi notificandone il completamento"""
+        try:
+            return await stage
+        except Exception as e:
+            logger.error(f"Errore durante {label}: {e}")
+            return {"error": str(e)}
+        finally:
+            if progress_callback:
+                progress_callback(f"Completato: {label}")
+    
+    async def analyze_company(self, user_input: str, progress_callback=None,
+                              report_callback=None) -> Dict[str, Any]:
         """Esegue analisi completa dell'azienda"""
         
         results = {
@@ -582,52 +1114,81 @@ class BusinessAnalyzer:
         }
         
         try:
-            # Step 1: Analisi SEMRush
-            if progress_callback:
-                progress_callback("Analisi SEO e traffico con SEMRush...")
-            
-            semrush_results = await self.semrush_agent.analyze_company(user_input)
-            results["analysis_results"]["semrush"] = semrush_results
-            
-            # Estrai informazioni base
-            if "domain" in semrush_results:
-                results["website"] = semrush_results["domain"]
-            
-            # Step 2: Ricerca competitor
-            if progress_callback:
-                progress_callback("Ricerca competitor con Serper.dev...")
-            
+            # Estrai informazioni base, necessarie a tutti i passi
             company_name = self._extract_company_name(user_input)
+            partita_iva = self._extract_partita_iva(user_input)
             results["company_name"] = company_name
+            results["website"] = self.semrush_agent.get_domain_from_input(user_input) or ""
             
-            competitor_results = await self.serper_agent.search_competitors(company_name)
-            results["analysis_results"]["competitors"] = competitor_results
-            
-            # Step 3: Analisi social media
+            # Step 1-4: SEMRush, competitor, social e dati finanziari sono
+            # indipendenti tra loro e vengono eseguiti in parallelo
             if progress_callback:
-                progress_callback("Analisi profili social media...")
+                progress_callback("Analisi SEO, competitor, social media e dati finanziari...")
             
-            social_results = await self.social_agent.find_social_profiles(
-                company_name, results["website"]
-            )
-            results["analysis_results"]["social"] = social_results
+            stages = {
+                "semrush": (
+                    "analisi SEO e traffico con SEMRush",
+                    lambda: self.semrush_agent.analyze_company(user_input)
+                ),
+                "competitors": (
+                    "ricerca competitor con Serper.dev",
+                    lambda: self.serper_agent.search_competitors(company_name)
+                ),
+                "social": (
+                    "analisi profili social media",
+                    lambda: self.social_agent.find_social_profiles(company_name, results["website"])
+                ),
+                "financial": (
+                    "ricerca dati finanziari",
+                    lambda: self.financial_agent.analyze_financial_data(partita_iva, company_name)
+                )
+            }
             
-            # Step 4: Analisi finanziaria
-            if progress_callback:
-                progress_callback("Ricerca dati finanziari...")
+            # Riprende un'analisi interrotta: i passi già completati non vengono ripetuti
+            snapshot_path = self._snapshot_path(user_input)
+            snapshot = self._load_snapshot(snapshot_path)
+            stage_results = {
+                name: stage_result for name, stage_result in snapshot.get("analysis_results", {}).items()
+                if name in stages and self._stage_completed(stage_result)
+            }
+            # Con passi ripresi il timestamp resta quello dei dati più vecchi,
+            # così lo snapshot scade comunque e il report non sembra più recente
+            if stage_results:
+                results["timestamp"] = snapshot["timestamp"]
             
-            partita_iva = self._extract_partita_iva(user_input)
-            financial_results = await self.financial_agent.analyze_financial_data(
-                partita_iva, company_name
-            )
-            results["analysis_results"]["financial"] = financial_results
+            async def run_stage(name: str, label: str, stage_factory):
+                stage_results[name] = await self._run_stage(label, stage_factory(), progress_callback)
+                results["analysis_results"] = stage_results
+                self._save_snapshot(snapshot_path, results)
+            
+            await asyncio.gather(*(
+                run_stage(name, label, stage_factory)
+                for name, (label, stage_factory) in stages.items()
+                if name not in stage_results
+            ))
+            results["analysis_results"] = {name: stage_results[name] for name in stages}
+            
+            if self.batch_mode:
+                if progress_callback:
+                    progress_callback("Elaborazione job OpenAI Batch in corso...")
+                await self._resolve_batch_requests(results["analysis_results"])
+                self._save_snapshot(snapshot_path, results)
             
             # Step 5: Generazione report
             if progress_callback:
                 progress_callback("Generazione report finale...")
             
-            final_report = await self.report_agent.generate_comprehensive_report(results)
+            if self.batch_mode:
+                request = await self.report_agent.analyze(*self.report_agent.prepare_report_input(results))
+                responses = await self._run_batch([request])
+                analysis = self._parse_batch_response(self.report_agent, responses.get(request["custom_id"]))
+                final_report = await self.report_agent.generate_comprehensive_report(results, analysis)
+            else:
+                final_report = await self.report_agent.generate_comprehensive_report(
+                    results, on_partial=report_callback
+                )
             results["final_report"] = final_report
+            self._save_snapshot(snapshot_path, results)
             
             return results
             
@@ -644,14 +1205,14 @@ class BusinessAnalyzer:
             return domain.replace('www.', '').replace('.com', '').replace('.it', '')
         
         # Se contiene numeri, potrebbe essere P.IVA
-        if re.search(r'\d{11}', user_input):
+        if _PIVA_RE.search(user_input):
             return "Azienda da P.IVA"
         
         return user_input
     
     def _extract_partita_iva(self, user_input: str) -> str:
         """Estrae P.IVA dall'input se presente"""
-        piva_match = re.search(r'\d{11}', user_input)
+        piva_match = _PIVA_RE.search(user_input)
         return piva_match.group() if piva_match else ""
 
 # Configurazione Streamlit
@@ -675,6 +1236,42 @@ def setup_streamlit_page():
     - Dati finanziari aziendali
     """)
 
+def get_session_loop() -> asyncio.AbstractEventLoop:
+    """Event loop persistente della sessione Streamlit"""
+    if "loop" not in st.session_state:
+        st.session_state.loop = asyncio.new_event_loop()
+    return st.session_state.loop
+
+def run_in_session_loop(coro):
+    """Esegue una coroutine nel loop di sessione, cancellando i task rimasti se interrotta"""
+    loop = get_session_loop()
+    task = loop.create_task(coro)
+    try:
+        return loop.run_until_complete(task)
+    except BaseException:
+        # Rerun/stop di Streamlit: l'eccezione esce da gather senza cancellare i
+        # passi fratelli, quindi si cancellano tutti i task ancora attivi nel loop
+        pending = asyncio.all_tasks(loop)
+        for pending_task in pending:
+            pending_task.cancel()
+        if pending:
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        raise
+
+def get_session_analyzer(openai_key: str, semrush_key: str, serper_key: str, batch_mode: bool) -> "BusinessAnalyzer":
+    """Restituisce l'analyzer della sessione, ricreandolo se cambia la configurazione"""
+    config = (openai_key, semrush_key, serper_key, batch_mode, os.getenv("REDIS_URL"))
+    if st.session_state.get("analyzer_config") != config:
+        previous = st.session_state.get("analyzer")
+        if previous is not None:
+            run_in_session_loop(previous.aclose())
+        
+        analyzer = BusinessAnalyzer(batch_mode=batch_mode)
+        analyzer.setup_agents(openai_key, semrush_key, serper_key, config[-1])
+        st.session_state.analyzer = analyzer
+        st.session_state.analyzer_config = config
+    return st.session_state.analyzer
+
 def main():
     """Funzione principale Streamlit"""
     setup_streamlit_page()
@@ -685,7 +1282,7 @@ def main():
     openai_key = st.sidebar.text_input(
         "OpenAI API Key", 
         type="password",
-        help="Chiave API per OpenAI GPT-4"
+        help="Chiave API per OpenAI"
     )
     
     semrush_key = st.sidebar.text_input(
@@ -700,6 +1297,13 @@ def main():
         help="Chiave API per Serper.dev"
     )
     
+    st.sidebar.header("⚙️ Opzioni")
+    
+    batch_mode = st.sidebar.checkbox(
+        "Modalità batch (OpenAI Batch API)",
+        help="Costi OpenAI ridotti del 50%, ma il completamento può richiedere fino a 24 ore"
+    )
+    
     # Input principale
     st.header("📝 Inserisci i dati dell'azienda da analizzare")
     
@@ -724,29 +1328,31 @@ def main():
             st.error("⚠️ Compila tutti i campi obbligatori")
             return
         
-        # Inizializza analyzer
-        analyzer = BusinessAnalyzer()
-        analyzer.setup_agents(openai_key, semrush_key, serper_key)
+        # Analyzer persistente: pool HTTP, client OpenAI e Redis restano aperti tra i rerun
+        analyzer = get_session_analyzer(openai_key, semrush_key, serper_key, batch_mode)
         
         # Progress tracking
         progress_bar = st.progress(0)
         status_text = st.empty()
+        report_preview = st.empty()
         
         def update_progress(message):
             status_text.text(f"🔄 {message}")
         
+        def update_report(partial_report):
+            # Anteprima del report mentre il modello lo genera
+            report_preview.code(partial_report, language="json")
+        
         # Esegui analisi
         with st.spinner("Analisi in corso..."):
             try:
-                # Simula async in Streamlit
-                import asyncio
-                
                 async def run_analysis():
-                    return await analyzer.analyze_company(user_input, update_progress)
+                    return await analyzer.analyze_company(user_input, update_progress, update_report)
                 
-                # Esegui analisi asincrona
-                results = asyncio.run(run_analysis())
+                # Esegui analisi asincrona nel loop di sessione
+                results = run_in_session_loop(run_analysis())
                 
+                report_preview.empty()
                 progress_bar.progress(100)
                 status_text.text("✅ Analisi completata!")
                 
@@ -803,6 +1409,7 @@ def main():
             except Exception as e:
                 progress_bar.progress(0)
                 status_text.text("")
+                report_preview.empty()
                 st.error(f"❌ Errore durante l'analisi: {str(e)}")
                 logger.error(f"Errore Streamlit: {e}")
     
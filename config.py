@@ -1,6 +1,15 @@
 # Configuration file for Business Intelligence Analyzer
-import os
-from typing import Dict, List
+from __future__ import annotations
+
+import functools
+import re
+from pathlib import Path
+from types import MappingProxyType
+from typing import TYPE_CHECKING
+
+# Usati solo nelle annotazioni: nessun costo a runtime
+if TYPE_CHECKING:
+    from typing import Dict, List, Tuple
 
 class Config:
     """Configurazione centrale dell'applicazione"""
@@ -21,47 +30,52 @@ class Config:
     
     # SEMRush specific configurations
     SEMRUSH_DISPLAY_LIMIT = 50
-    SEMRUSH_EXPORT_COLUMNS = {
-        'organic': 'Dn,Cr,Np,Or,Ot,Oc,Ad,At,Ac',
-        'backlinks': 'target_url,source_url,anchor,last_seen',
-        'competitors': 'Dn,Cr,Np,Or'
-    }
+    _ORGANIC_COLS = ('Dn', 'Cr', 'Np', 'Or', 'Ot', 'Oc', 'Ad', 'At', 'Ac')
+    _BACKLINKS_COLS = ('target_url', 'source_url', 'anchor', 'last_seen')
+    _COMPETITORS_COLS = ('Dn', 'Cr', 'Np', 'Or')
+    # (stringa per il parametro API, tupla per iterare sulle colonne)
+    SEMRUSH_EXPORT_COLUMNS = MappingProxyType({
+        'organic': (','.join(_ORGANIC_COLS), _ORGANIC_COLS),
+        'backlinks': (','.join(_BACKLINKS_COLS), _BACKLINKS_COLS),
+        'competitors': (','.join(_COMPETITORS_COLS), _COMPETITORS_COLS)
+    })
     
     # Serper search configurations
-    SERPER_SEARCH_PARAMS = {
+    SERPER_SEARCH_PARAMS = MappingProxyType({
         'gl': 'it',  # Geolocation: Italy
         'hl': 'it',  # Language: Italian
         'num': 20,   # Number of results
         'type': 'search'
-    }
+    })
     
     # Social media platforms to analyze
-    SOCIAL_PLATFORMS = [
+    SOCIAL_PLATFORMS = (
         'instagram',
         'facebook', 
         'linkedin',
         'youtube',
         'tiktok',
         'twitter'
-    ]
+    )
+    SOCIAL_PLATFORMS_SET = frozenset(SOCIAL_PLATFORMS)
     
     # Financial data sources
-    FINANCIAL_SOURCES = [
+    FINANCIAL_SOURCES = (
         'https://www.registroimprese.it/',
         'https://www.ufficiocamerale.it/',
         'https://www.reportaziende.it/',
         'https://www.aida.bvdinfo.com/'
-    ]
+    )
     
     # OpenAI model configurations
-    OPENAI_MODELS = {
+    OPENAI_MODELS = MappingProxyType({
         'analysis': 'gpt-4',
         'summary': 'gpt-3.5-turbo',
         'extraction': 'gpt-3.5-turbo'
-    }
+    })
     
     # Report templates
-    REPORT_SECTIONS = [
+    REPORT_SECTIONS = (
         'executive_summary',
         'company_profile', 
         'financial_analysis',
@@ -71,210 +85,156 @@ class Config:
         'swot_analysis',
         'recommendations',
         'conclusions'
-    ]
+    )
+    REPORT_SECTIONS_SET = frozenset(REPORT_SECTIONS)
     
     # Data validation rules
-    VALIDATION_RULES = {
+    VALIDATION_RULES = MappingProxyType({
         'partita_iva': r'^\d{11}$',
         'codice_fiscale': r'^[A-Z]{6}\d{2}[A-Z]\d{2}[A-Z]\d{3}[A-Z]$',
         'domain': r'^[a-zA-Z0-9][a-zA-Z0-9-]{1,61}[a-zA-Z0-9]\.[a-zA-Z]{2,}$',
         'url': r'^https?://'
-    }
+    })
     
-    @classmethod
-    def get_api_key(cls, service: str) -> str:
-        """Recupera chiave API da variabili ambiente"""
-        env_vars = {
-            'openai': 'OPENAI_API_KEY',
-            'semrush': 'SEMRUSH_API_KEY', 
-            'serper': 'SERPER_API_KEY'
-        }
-        
-        return os.getenv(env_vars.get(service, ''), '')
-    
-    @classmethod
-    def validate_input(cls, input_type: str, value: str) -> bool:
-        """Valida input secondo le regole definite"""
-        import re
-        
-        if input_type not in cls.VALIDATION_RULES:
-            return False
-        
-        pattern = cls.VALIDATION_RULES[input_type]
-        return bool(re.match(pattern, value))
+    # Template delle query di ricerca (azienda e settore)
+    _BASE_QUERIES = ('"%s" azienda', '%s competitor', '%s alternative', '%s simili')
+    _SECTOR_QUERIES = ('%s aziende Italia', '%s leader mercato italiano', 'migliori %s Italia')
     
     @classmethod
     def get_search_queries(cls, company_name: str, sector: str = "") -> List[str]:
         """Genera query di ricerca ottimizzate"""
-        base_queries = [
-            f'"{company_name}" azienda',
-            f'{company_name} competitor',
-            f'{company_name} alternative',
-            f'{company_name} simili'
-        ]
+        base_queries = [template % company_name for template in cls._BASE_QUERIES]
         
         if sector:
-            sector_queries = [
-                f'{sector} aziende Italia',
-                f'{sector} leader mercato italiano',
-                f'migliori {sector} Italia'
-            ]
-            base_queries.extend(sector_queries)
+            base_queries += [template % sector for template in cls._SECTOR_QUERIES]
         
         return base_queries
     
+    # Parametri SEMRush completi per tipo di report (tranne chiave e dominio)
+    _SEMRUSH_DEFAULT_PARAMS = {
+        'display_limit': str(SEMRUSH_DISPLAY_LIMIT),
+        'database': 'it'  # Database italiano
+    }
+    _SEMRUSH_TYPE_TEMPLATES = {
+        'organic': {
+            **_SEMRUSH_DEFAULT_PARAMS,
+            'type': 'domain_organic',
+            'export_columns': SEMRUSH_EXPORT_COLUMNS['organic'][0]
+        },
+        'backlinks': {
+            **_SEMRUSH_DEFAULT_PARAMS,
+            'type': 'backlinks_overview',
+            'export_columns': SEMRUSH_EXPORT_COLUMNS['backlinks'][0]
+        },
+        'competitors': {
+            **_SEMRUSH_DEFAULT_PARAMS,
+            'type': 'domain_organic_organic',
+            'export_columns': SEMRUSH_EXPORT_COLUMNS['competitors'][0]
+        },
+        'paid': {
+            **_SEMRUSH_DEFAULT_PARAMS,
+            'type': 'domain_adwords',
+            'export_columns': 'Dn,Cr,Np,Ad,At,Ac'
+        }
+    }
+    
     @classmethod
     def get_semrush_params(cls, domain: str, report_type: str) -> Dict[str, str]:
         """Genera parametri per API SEMRush"""
-        base_params = {
-            'key': cls.get_api_key('semrush'),
-            'domain': domain,
-            'display_limit': str(cls.SEMRUSH_DISPLAY_LIMIT),
-            'database': 'it'  # Database italiano
-        }
-        
-        type_configs = {
-            'organic': {
-                'type': 'domain_organic',
-                'export_columns': cls.SEMRUSH_EXPORT_COLUMNS['organic']
-            },
-            'backlinks': {
-                'type': 'backlinks_overview',
-                'export_columns': cls.SEMRUSH_EXPORT_COLUMNS['backlinks']
-            },
-            'competitors': {
-                'type': 'domain_organic_organic',
-                'export_columns': cls.SEMRUSH_EXPORT_COLUMNS['competitors']
-            },
-            'paid': {
-                'type': 'domain_adwords',
-                'export_columns': 'Dn,Cr,Np,Ad,At,Ac'
-            }
-        }
-        
-        if report_type in type_configs:
-            base_params.update(type_configs[report_type])
-        
-        return base_params
+        template = cls._SEMRUSH_TYPE_TEMPLATES.get(report_type, cls._SEMRUSH_DEFAULT_PARAMS)
+        return {'key': get_api_key('semrush'), 'domain': domain, **template}
 
-class PromptTemplates:
-    """Template per prompt AI ottimizzati"""
-    
-    SEMRUSH_ANALYZER = """
-    Sei un esperto analista SEO e digital marketing. Analizza i seguenti dati SEMRush e fornisci insights strutturati.
-    
-    DATI DA ANALIZZARE:
-    {data}
-    
-    FORNISCI UN'ANALISI STRUTTURATA CHE INCLUDA:
-    1. Panoramica performance SEO (traffico, keyword, visibilità)
-    2. Analisi backlink profile (qualità, diversità, opportunità)
-    3. Competitor landscape (chi sono, punti di forza/debolezza)
-    4. Gap analysis e opportunità di crescita
-    5. Raccomandazioni actionable prioritizzate
-    
-    Formato output: JSON strutturato con sezioni chiare e metriche quantificate.
-    """
-    
-    COMPETITOR_ANALYZER = """
-    Sei un esperto di competitive intelligence. Analizza i risultati di ricerca per identificare e profilare i competitor.
-    
-    RISULTATI RICERCA:
-    {data}
-    
-    PER OGNI COMPETITOR IDENTIFICATO, ESTRAI:
-    1. Nome azienda e ragione sociale
-    2. Sito web e presenza digitale
-    3. Proposta di valore principale
-    4. Prodotti/servizi chiave
-    5. Mercato geografico di riferimento
-    6. Dimensione stimata (se deducibile)
-    7. Punti di forza distintivi
-    
-    Formato output: JSON con array di competitor ordinati per rilevanza/dimensione.
-    """
-    
-    SOCIAL_ANALYZER = """
-    Sei un esperto di social media marketing e analytics. Analizza la presenza social dell'azienda.
-    
-    DATI SOCIAL:
-    {data}
-    
-    ANALIZZA E FORNISCI:
-    1. Panoramica presence su ogni piattaforma
-    2. Metriche di engagement e performance
-    3. Tipologia e qualità dei contenuti
-    4. Frequenza di pubblicazione
-    5. Audience analysis (quando possibile)
-    6. Benchmark vs competitor (se disponibili)
-    7. Raccomandazioni per miglioramento
-    
-    Formato output: JSON strutturato per piattaforma con KPI e insights.
-    """
-    
-    FINANCIAL_ANALYZER = """
-    Sei un analista finanziario esperto in valutazione aziendale. Analizza i dati finanziari forniti.
-    
-    DATI FINANZIARI:
-    {data}
-    
-    CONDUCI ANALISI SU:
-    1. Trend fatturato e crescita (%, CAGR)
-    2. Solidità patrimoniale (ratios, leverage)
-    3. Efficienza operativa (costi, margini)
-    4. Dimensione organizzativa (dipendenti, produttività)
-    5. Benchmark settoriale (quando possibile)
-    6. Indicatori di salute finanziaria
-    7. Proiezioni e raccomandazioni
-    
-    Formato output: JSON con sezioni finanziarie e assessment qualitativo.
-    """
+# Helper di Config come funzioni di modulo: le chiamate frequenti evitano il
+# binding dei classmethod (restano disponibili anche come Config.<nome>)
+
+# Regole banali verificate senza regex (prefisso e lunghezza + cifre)
+_FAST_RULES = {
+    'url': lambda value: value.startswith(('http://', 'https://')),
+    'partita_iva': lambda value: len(value) == 11 and value.isdecimal()
+}
+
+# Regole restanti compilate una sola volta all'import
+_COMPILED_RULES = {
+    'codice_fiscale': re.compile(Config.VALIDATION_RULES['codice_fiscale']),
+    'domain': re.compile(Config.VALIDATION_RULES['domain'])
+}
+
+# Controlli economici che scartano quasi tutti gli input non validi prima della regex
+_PREFILTERS = {
+    'codice_fiscale': lambda value: len(value) == 16 and value.isalnum(),
+    'domain': lambda value: '.' in value and len(value) <= 253
+}
+
+# Variabili ambiente delle chiavi API
+_ENV_VARS = {
+    'openai': 'OPENAI_API_KEY',
+    'semrush': 'SEMRUSH_API_KEY', 
+    'serper': 'SERPER_API_KEY'
+}
+
+@functools.lru_cache(maxsize=8)
+def get_api_key(service: str) -> str:
+    """Recupera chiave API da variabili ambiente"""
+    # os importato solo quando serve davvero una chiave
+    import os
+    
+    # Valore memorizzato: dopo una rotazione delle chiavi usare get_api_key.cache_clear()
+    return os.getenv(_ENV_VARS.get(service, ''), '')
+
+def validate_input(input_type: str, value: str) -> bool:
+    """Valida input secondo le regole definite"""
+    fast_rule = _FAST_RULES.get(input_type)
+    if fast_rule is not None:
+        return fast_rule(value)
     
-    REPORT_GENERATOR = """
-    Sei un consulente senior di business intelligence. Crea un report esecutivo completo e professionale.
+    pattern = _COMPILED_RULES.get(input_type)
+    if pattern is None:
+        return False
     
-    DATI COMPLETI RACCOLTI:
-    {data}
+    prefilter = _PREFILTERS.get(input_type)
+    if prefilter is not None and not prefilter(value):
+        return False
     
-    STRUTTURA IL REPORT CON:
-    1. EXECUTIVE SUMMARY (3-4 bullet point chiave)
-    2. PROFILO AZIENDALE (overview strutturata)
-    3. ANALISI PERFORMANCE DIGITALE (SEO, social, web)
-    4. COMPETITIVE LANDSCAPE (competitor mapping)
-    5. ANALISI FINANZIARIA (trend, KPI, solidità)
-    6. SWOT ANALYSIS (strutturata e bilanciata)
-    7. RACCOMANDAZIONI STRATEGICHE (actionable, prioritizzate)
-    8. CONCLUSIONI E NEXT STEPS
+    return bool(pattern.match(value))
+
+Config.get_api_key = staticmethod(get_api_key)
+Config.validate_input = staticmethod(validate_input)
+
+# Cartella dei template dei prompt, letti solo al primo utilizzo
+PROMPTS_DIR = Path(__file__).with_name('prompts')
+
+class PromptTemplates:
+    """Template per prompt AI ottimizzati"""
     
-    Il report deve essere:
-    - Professionale e ben strutturato
-    - Orientato all'azione e al business
-    - Supportato da dati quantitativi
-    - Comprensibile per executive non tecnici
+    _TEMPLATE_FILES = {
+        'semrush': 'semrush.txt',
+        'competitor': 'competitor.txt',
+        'social': 'social.txt',
+        'financial': 'financial.txt',
+        'report': 'report.txt'
+    }
     
-    Formato output: Markdown professionale pronto per presentazione.
-    """
+    @staticmethod
+    @functools.cache
+    def _load(prompt_type: str) -> Tuple[str, str]:
+        """Legge un template da file (una sola volta per processo) e lo divide attorno a {data}"""
+        template_file = PromptTemplates._TEMPLATE_FILES[prompt_type]
+        template = (PROMPTS_DIR / template_file).read_text(encoding='utf-8').strip()
+        prefix, _, suffix = template.partition('{data}')
+        return prefix, suffix
     
     @classmethod
     def get_prompt(cls, prompt_type: str, data: str, context: str = "") -> str:
         """Genera prompt specifico con dati"""
-        templates = {
-            'semrush': cls.SEMRUSH_ANALYZER,
-            'competitor': cls.COMPETITOR_ANALYZER,
-            'social': cls.SOCIAL_ANALYZER,
-            'financial': cls.FINANCIAL_ANALYZER,
-            'report': cls.REPORT_GENERATOR
-        }
+        if prompt_type not in cls._TEMPLATE_FILES:
+            raise ValueError(f"prompt_type sconosciuto: {prompt_type!r}")
         
-        if prompt_type not in templates:
-            return f"Analizza i seguenti dati: {data}"
-        
-        prompt = templates[prompt_type].format(data=data)
+        # {data} è l'unico segnaposto: nessun parsing di str.format a ogni chiamata
+        prefix, suffix = cls._load(prompt_type)
         
         if context:
-            prompt += f"\n\nCONTESTO AGGIUNTIVO:\n{context}"
-        
-        return prompt
+            return f"{prefix}{data}{suffix}\n\nCONTESTO AGGIUNTIVO:\n{context}"
+        return f"{prefix}{data}{suffix}"
 
 class ErrorMessages:
     """Messaggi di errore standardizzati"""
@@ -291,10 +251,14 @@ class ErrorMessages:
     ANALYSIS_FAILED = "Analisi fallita: {reason}"
     REPORT_GENERATION_FAILED = "Errore generazione report: {reason}"
     
-    @classmethod
-    def format_error(cls, error_type: str, **kwargs) -> str:
-        """Formatta messaggio di errore"""
-        if hasattr(cls, error_type):
-            template = getattr(cls, error_type)
-            return template.format(**kwargs)
-        return f"Errore sconosciuto: {error_type}"
+    # Tutti i messaggi sopra, indicizzati per nome
+    _TEMPLATES = {name: value for name, value in list(locals().items()) if name.isupper()}
+
+def format_error(error_type: str, **kwargs) -> str:
+    """Formatta messaggio di errore"""
+    template = ErrorMessages._TEMPLATES.get(error_type)
+    if template is not None:
+        return template.format(**kwargs)
+    return f"Errore sconosciuto: {error_type}"
+
+ErrorMessages.format_error = staticmethod(format_error)
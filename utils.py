@@ -1,214 +1,387 @@
 # Utility functions for Business Intelligence Analyzer
+import functools
 import re
 import time
 import hashlib
-import json
+import heapq
 import asyncio
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Union
+import html as html_lib
+from collections import deque
+import orjson
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Tuple, Union
 from urllib.parse import urlparse, urljoin
-import requests
+import aiohttp
 from bs4 import BeautifulSoup
+from lxml import etree
 import logging
 
+# Opzionale: hash non crittografico più veloce per le chiavi cache
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 logger = logging.getLogger(__name__)
 
-class InputProcessor:
-    """Processore intelligente per input utente"""
-    
-    @staticmethod
-    def identify_input_type(user_input: str) -> Dict[str, Any]:
-        """Identifica il tipo di input fornito dall'utente"""
-        user_input = user_input.strip()
-        
-        result = {
-            'original_input': user_input,
-            'input_type': 'unknown',
-            'extracted_data': {},
-            'confidence': 0.0
-        }
-        
-        # Check se è un URL
-        if user_input.startswith(('http://', 'https://')):
-            result['input_type'] = 'url'
-            result['extracted_data']['url'] = user_input
-            result['extracted_data']['domain'] = urlparse(user_input).netloc
-            result['confidence'] = 1.0
-            return result
-        
-        # Check se è una Partita IVA italiana (11 cifre)
-        piva_match = re.search(r'\b\d{11}\b', user_input)
-        if piva_match:
-            result['input_type'] = 'partita_iva'
-            result['extracted_data']['partita_iva'] = piva_match.group()
-            result['confidence'] = 0.9
-            
-            # Prova a estrarre anche il nome azienda se presente
-            company_name = re.sub(r'\b\d{11}\b', '', user_input).strip()
-            if company_name:
-                result['extracted_data']['company_name'] = company_name
-            return result
-        
-        # Check se è un dominio (senza http)
-        domain_pattern = r'^[a-zA-Z0-9][a-zA-Z0-9-]{1,61}[a-zA-Z0-9]\.[a-zA-Z]{2,}$'
-        if re.match(domain_pattern, user_input):
-            result['input_type'] = 'domain'
-            result['extracted_data']['domain'] = user_input
-            result['confidence'] = 0.8
-            return result
-        
-        # Check se contiene un dominio
-        domain_in_text = re.search(r'\b([a-zA-Z0-9][a-zA-Z0-9-]{1,61}[a-zA-Z0-9]\.[a-zA-Z]{2,})\b', user_input)
-        if domain_in_text:
-            result['input_type'] = 'company_with_domain'
-            result['extracted_data']['domain'] = domain_in_text.group(1)
-            result['extracted_data']['company_name'] = user_input.replace(domain_in_text.group(1), '').strip()
-            result['confidence'] = 0.7
-            return result
-        
-        # Default: nome azienda
-        result['input_type'] = 'company_name'
-        result['extracted_data']['company_name'] = user_input
-        result['confidence'] = 0.5
-        
-        return result
+# Pattern compilati una sola volta all'import
+_PIVA_RE = re.compile(r'\b\d{11}\b')
+_DOMAIN_RE = re.compile(r'^[a-zA-Z0-9][a-zA-Z0-9-]{1,61}[a-zA-Z0-9]\.[a-zA-Z]{2,}$')
+# Classificazione dell'input in un solo match ancorato: le alternative sono provate
+# in ordine di priorità (URL, P.IVA ovunque, dominio, dominio nel testo) e i
+# lookahead cercano P.IVA e dominio in qualunque posizione, come farebbe search()
+_INPUT_TYPE_RE = re.compile(
+    r'^(?:'
+    r'(?P<url>https?://)'
+    r'|(?=.*?(?P<partita_iva>\b\d{11}\b))'
+    r'|(?P<domain>[a-zA-Z0-9][a-zA-Z0-9-]{1,61}[a-zA-Z0-9]\.[a-zA-Z]{2,})$'
+    r'|(?=.*?\b(?P<company_with_domain>[a-zA-Z0-9][a-zA-Z0-9-]{1,61}[a-zA-Z0-9]\.[a-zA-Z]{2,})\b)'
+    r')',
+    re.DOTALL
+)
+# Forme giuridiche in un'unica alternanza (le più frequenti per prime)
+_LEGAL_FORMS_RE = re.compile(
+    r'\b(?:s\.?r\.?l\.?|s\.?p\.?a\.?|s\.?n\.?c\.?|s\.?a\.?s\.?|ltd|llc|inc|corp)\b',
+    re.IGNORECASE
+)
+_WS_RE = re.compile(r'\s+')
+_NONWORD_RE = re.compile(r'[^\w\s-]')
+_NON_DIGIT_RE = re.compile(r'[^\d]')
+# Cifra raddoppiata e ridotta a una cifra (2*d, meno 9 se >= 10) per il checksum P.IVA
+_PIVA_DOUBLE = bytes([0, 2, 4, 6, 8, 1, 3, 5, 7, 9])
+# Byte massimi scaricati per pagina: title e meta description stanno nell'<head>
+MAX_PAGE_BYTES = 512 * 1024
+# Caratteri pericolosi rimossi con str.translate (un solo passaggio in C)
+_UNSAFE_CHARS = str.maketrans('', '', '<>"\'/\\{}();')
+# (piattaforma, dominio per il controllo rapido sull'href, pattern del profilo)
+_SOCIAL_PATTERNS = (
+    ('facebook', 'facebook.com', re.compile(r'facebook\.com/[^/\s"\']+', re.IGNORECASE)),
+    ('instagram', 'instagram.com', re.compile(r'instagram\.com/[^/\s"\']+', re.IGNORECASE)),
+    ('linkedin', 'linkedin.com', re.compile(r'linkedin\.com/company/[^/\s"\']+', re.IGNORECASE)),
+    ('youtube', 'youtube.com', re.compile(r'youtube\.com/[^/\s"\']+', re.IGNORECASE)),
+    ('twitter', 'twitter.com', re.compile(r'twitter\.com/[^/\s"\']+', re.IGNORECASE)),
+    ('tiktok', 'tiktok.com', re.compile(r'tiktok\.com/@[^/\s"\']+', re.IGNORECASE))
+)
+# Title e meta description cercati direttamente sui byte della risposta;
+# il contenuto deve chiudersi con le stesse virgolette (niente troncamenti)
+_TITLE_RE = re.compile(rb'<title[^>]*>([^<]{0,500})</title>', re.IGNORECASE)
+_META_DESC_RE = re.compile(
+    rb'<meta[^>]+name=["\']description["\'][^>]+content=(?:"([^"]{0,500})"|\'([^\']{0,500})\')',
+    re.IGNORECASE
+)
+_EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+# Numeri in formato italiano (per fatturati, dipendenti, etc.): con separatori
+# delle migliaia, oppure cifre semplici; decimali opzionali dopo la virgola
+_NUMBER_RE = re.compile(r'\d{1,3}(?:\.\d{3})+(?:,\d{2})?|\d+(?:,\d{2})?')
+# Formato italiano -> float: via i punti delle migliaia, virgola decimale -> punto
+_NUMBER_TRANS = str.maketrans({'.': None, ',': '.'})
+
+@functools.lru_cache(maxsize=4096)
+def _identify_input_type(user_input: str) -> Tuple[str, Tuple[Tuple[str, str], ...], float]:
+    """Classifica l'input (già ripulito): tipo, dati estratti e confidenza, immutabili per la cache"""
+    match = _INPUT_TYPE_RE.match(user_input)
+    input_type = match.lastgroup if match else None
+    
+    # Check se è un URL
+    if input_type == 'url':
+        return 'url', (('url', user_input), ('domain', urlparse(user_input).netloc)), 1.0
+    
+    # Check se è una Partita IVA italiana (11 cifre)
+    if input_type == 'partita_iva':
+        extracted = (('partita_iva', match.group('partita_iva')),)
+        
+        # Prova a estrarre anche il nome azienda se presente
+        company_name = _PIVA_RE.sub('', user_input).strip()
+        if company_name:
+            extracted += (('company_name', company_name),)
+        return 'partita_iva', extracted, 0.9
+    
+    # Check se è un dominio (senza http)
+    if input_type == 'domain':
+        return 'domain', (('domain', user_input),), 0.8
+    
+    # Check se contiene un dominio
+    if input_type == 'company_with_domain':
+        domain = match.group('company_with_domain')
+        return 'company_with_domain', (
+            ('domain', domain),
+            ('company_name', user_input.replace(domain, '').strip())
+        ), 0.7
+    
+    # Default: nome azienda
+    return 'company_name', (('company_name', user_input),), 0.5
+
+@functools.lru_cache(maxsize=1024)
+def _domain_suggestions(company_name: str) -> Tuple[str, ...]:
+    """Domini candidati per un nome azienda, immutabili per la cache"""
+    clean_name = clean_company_name(company_name).lower()
+    
+    # Solo lettere e cifre
+    domain_base = ''.join(ch for ch in clean_name if ch.isalnum())
+    
+    suggestions = (
+        f"{domain_base}.it",
+        f"{domain_base}.com",
+        f"www.{domain_base}.it",
+        f"www.{domain_base}.com"
+    )
+    
+    # Aggiungi varianti con trattini
+    words = clean_name.split()
+    if len(words) > 1:
+        hyphenated = '-'.join(words)
+        suggestions += (f"{hyphenated}.it", f"{hyphenated}.com")
+    
+    return suggestions
+
+def identify_input_type(user_input: str) -> Dict[str, Any]:
+    """Identifica il tipo di input fornito dall'utente"""
+    user_input = user_input.strip()
+    input_type, extracted_data, confidence = _identify_input_type(user_input)
+    
+    # Dizionario nuovo a ogni chiamata: il chiamante può modificarlo senza toccare la cache
+    return {
+        'original_input': user_input,
+        'input_type': input_type,
+        'extracted_data': dict(extracted_data),
+        'confidence': confidence
+    }
+
+def clean_company_name(company_name: str) -> str:
+    """Pulisce e normalizza il nome azienda"""
+    # Rimuovi forme giuridiche comuni
+    cleaned = _LEGAL_FORMS_RE.sub('', company_name)
     
-    @staticmethod
-    def clean_company_name(company_name: str) -> str:
-        """Pulisce e normalizza il nome azienda"""
-        # Rimuovi forme giuridiche comuni
-        legal_forms = [
-            r'\bsrl\b', r'\bs\.r\.l\.\b', r'\bs\.r\.l\b',
-            r'\bspa\b', r'\bs\.p\.a\.\b', r'\bs\.p\.a\b',
-            r'\bsnc\b', r'\bs\.n\.c\.\b', r'\bs\.n\.c\b',
-            r'\bsas\b', r'\bs\.a\.s\.\b', r'\bs\.a\.s\b',
-            r'\bltd\b', r'\bllc\b', r'\binc\b', r'\bcorp\b'
-        ]
-        
-        cleaned = company_name
-        for form in legal_forms:
-            cleaned = re.sub(form, '', cleaned, flags=re.IGNORECASE)
-        
-        # Pulisci spazi extra e caratteri speciali
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
-        cleaned = re.sub(r'[^\w\s-]', '', cleaned)
-        
-        return cleaned
+    # Pulisci spazi extra e caratteri speciali
+    cleaned = _WS_RE.sub(' ', cleaned).strip()
+    cleaned = _NONWORD_RE.sub('', cleaned)
     
-    @staticmethod
-    def extract_domain_suggestions(company_name: str) -> List[str]:
-        """Genera possibili domini basati sul nome azienda"""
-        clean_name = InputProcessor.clean_company_name(company_name)
-        
-        # Rimuovi spazi e caratteri speciali
-        domain_base = re.sub(r'[^\w]', '', clean_name.lower())
-        
-        suggestions = [
-            f"{domain_base}.it",
-            f"{domain_base}.com", 
-            f"www.{domain_base}.it",
-            f"www.{domain_base}.com"
-        ]
-        
-        # Aggiungi varianti con trattini
-        if len(clean_name.split()) > 1:
-            words = [word.lower() for word in clean_name.split()]
-            hyphenated = '-'.join(words)
-            suggestions.extend([
-                f"{hyphenated}.it",
-                f"{hyphenated}.com"
-            ])
-        
-        return suggestions
+    return cleaned
+
+def extract_domain_suggestions(company_name: str) -> List[str]:
+    """Genera possibili domini basati sul nome azienda"""
+    return list(_domain_suggestions(company_name))
+
+class InputProcessor:
+    """Processore intelligente per input utente"""
+
+# Compatibilità con le chiamate InputProcessor.<nome> e DataValidator.<nome>
+InputProcessor.identify_input_type = staticmethod(identify_input_type)
+InputProcessor.clean_company_name = staticmethod(clean_company_name)
+InputProcessor.extract_domain_suggestions = staticmethod(extract_domain_suggestions)
+
+class _PageInfoTarget:
+    """Target del parser lxml: conserva solo title, meta description, href e testo"""
+    
+    def __init__(self, title: str = '', description: str = ''):
+        # Campi già noti (es. dalle regex sui byte) non vengono ricalcolati dal parser
+        self.title = title
+        self.description = description
+        self.hrefs = []
+        self.text_parts = []
+        self._title_parts = None
+    
+    def start(self, tag: str, attrib: Dict[str, str]):
+        if tag == 'title' and not self.title and self._title_parts is None:
+            self._title_parts = []
+        elif tag == 'meta' and not self.description and attrib.get('name', '').lower() == 'description':
+            self.description = attrib.get('content', '')
+        elif tag == 'a' and attrib.get('href'):
+            self.hrefs.append(attrib['href'])
+    
+    def end(self, tag: str):
+        if tag == 'title' and self._title_parts is not None:
+            self.title = ''.join(self._title_parts)
+            self._title_parts = None
+    
+    def data(self, data: str):
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+        self.text_parts.append(data)
+    
+    def close(self) -> '_PageInfoTarget':
+        return self
 
 class DataEnricher:
     """Arricchimento dati tramite web scraping intelligente"""
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        # Sessione aiohttp creata al primo utilizzo, dentro l'event loop
+        self.session = None
+    
+    async def _ensure_session(self) -> aiohttp.ClientSession:
+        """Restituisce la sessione HTTP, creandola se necessario"""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                headers={
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+                },
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+        return self.session
+    
+    async def close(self):
+        """Chiude la sessione HTTP"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
     
     async def enrich_company_data(self, basic_data: Dict[str, Any]) -> Dict[str, Any]:
         """Arricchisce i dati aziendali base"""
         enriched = basic_data.copy()
+        lookups = []
         
         # Se abbiamo un dominio, prova a estrarre informazioni dal sito
         if 'domain' in basic_data:
-            website_data = await self._scrape_website_info(basic_data['domain'])
-            enriched.update(website_data)
+            lookups.append(self._scrape_website_info(basic_data['domain']))
         
         # Se abbiamo P.IVA, cerca su registri pubblici
         if 'partita_iva' in basic_data:
-            registry_data = await self._search_business_registries(basic_data['partita_iva'])
-            enriched.update(registry_data)
+            lookups.append(self._search_business_registries(basic_data['partita_iva']))
+        
+        # Ricerche indipendenti: eseguite in parallelo, unite nell'ordine originale
+        for lookup_data in await asyncio.gather(*lookups):
+            enriched.update(lookup_data)
         
         return enriched
     
+    async def enrich_many(self, basics: List[Dict[str, Any]], batch_size: int = 8) -> List[Dict[str, Any]]:
+        """Arricchisce più aziende in parallelo, al massimo batch_size alla volta"""
+        semaphore = asyncio.Semaphore(batch_size)
+        
+        async def enrich(basic_data: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.enrich_company_data(basic_data)
+        
+        return await asyncio.gather(*(enrich(basic_data) for basic_data in basics))
+    
     async def _scrape_website_info(self, domain: str) -> Dict[str, Any]:
         """Estrae informazioni dal sito web aziendale"""
-        info = {
-            'website_title': '',
-            'website_description': '',
-            'contact_info': {},
-            'social_links': {},
-            'business_info': {}
-        }
-        
         try:
             if not domain.startswith(('http://', 'https://')):
                 url = f"https://{domain}"
             else:
                 url = domain
             
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Estrai title e description
-            title_tag = soup.find('title')
-            if title_tag:
-                info['website_title'] = title_tag.get_text().strip()
-            
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            if meta_desc:
-                info['website_description'] = meta_desc.get('content', '').strip()
-            
-            # Cerca link social
-            social_patterns = {
-                'facebook': r'facebook\.com/[^/\s"\']+',
-                'instagram': r'instagram\.com/[^/\s"\']+',
-                'linkedin': r'linkedin\.com/company/[^/\s"\']+',
-                'youtube': r'youtube\.com/[^/\s"\']+',
-                'twitter': r'twitter\.com/[^/\s"\']+',
-                'tiktok': r'tiktok\.com/@[^/\s"\']+'
-            }
+            html = await self._fetch(url)
             
-            page_text = soup.get_text()
-            for platform, pattern in social_patterns.items():
-                matches = re.findall(pattern, page_text, re.IGNORECASE)
-                if matches:
-                    info['social_links'][platform] = f"https://{matches[0]}"
-            
-            # Cerca informazioni di contatto
-            email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-            phone_pattern = r'(\+39\s?)?[\d\s\-\(\)]{8,15}'
-            
-            emails = re.findall(email_pattern, page_text)
-            phones = re.findall(phone_pattern, page_text)
-            
-            if emails:
-                info['contact_info']['emails'] = list(set(emails))
-            if phones:
-                info['contact_info']['phones'] = list(set(phones))
+            # Parsing CPU-bound in un thread, così l'event loop resta libero per gli
+            # altri download in corso; i callback Python del target riprendono il GIL,
+            # quindi più parsing non avanzano in parallelo tra loro
+            return await asyncio.to_thread(self._parse, html)
             
         except Exception as e:
             logger.warning(f"Errore scraping {domain}: {e}")
         
+        return self._empty_info()
+    
+    async def _fetch(self, url: str) -> bytes:
+        """Scarica la pagina (al massimo MAX_PAGE_BYTES) e ne restituisce i byte"""
+        session = await self._ensure_session()
+        async with session.get(url) as response:
+            response.raise_for_status()
+            
+            # Lettura a blocchi: le pagine enormi vengono troncate invece che scaricate tutte
+            html = bytearray()
+            async for chunk in response.content.iter_chunked(32768):
+                html += chunk
+                if len(html) >= MAX_PAGE_BYTES:
+                    del html[MAX_PAGE_BYTES:]
+                    break
+            return bytes(html)
+    
+    @staticmethod
+    def _empty_info() -> Dict[str, Any]:
+        """Struttura vuota delle informazioni sul sito"""
+        return {
+            'website_title': '',
+            'website_description': '',
+            'contact_info': {},
+            'social_links': {},
+            'business_info': {}
+        }
+    
+    def _parse(self, html: bytes) -> Dict[str, Any]:
+        """Estrae title, description, contatti e link social dall'HTML (senza I/O)"""
+        info = self._empty_info()
+        page = self._parse_page(html)
+        
+        # Estrai title e description
+        info['website_title'] = page.title.strip()
+        info['website_description'] = page.description.strip()
+        
+        # Link social e contatti dagli href dei link,
+        # regex solo sugli href brevi che contengono il dominio della piattaforma
+        emails = []
+        phones = []
+        for href in page.hrefs:
+            href = href.strip()
+            href_lower = href.lower()
+            
+            if href_lower.startswith('mailto:'):
+                email = href[7:].split('?', 1)[0].strip()
+                if email:
+                    emails.append(email)
+            elif href_lower.startswith('tel:'):
+                phone = href[4:].strip()
+                if phone:
+                    phones.append(phone)
+            else:
+                for platform, platform_domain, pattern in _SOCIAL_PATTERNS:
+                    if platform_domain in href_lower and platform not in info['social_links']:
+                        match = pattern.search(href)
+                        if match:
+                            info['social_links'][platform] = f"https://{match.group()}"
+                        break
+        
+        # Email scritte solo nel testo della pagina
+        if not emails:
+            emails.extend(_EMAIL_RE.findall(' '.join(page.text_parts)))
+        
+        # Deduplica mantenendo l'ordine di apparizione (email senza distinzione maiuscole)
+        if emails:
+            info['contact_info']['emails'] = list(dict.fromkeys(email.lower() for email in emails))
+        if phones:
+            info['contact_info']['phones'] = list(dict.fromkeys(phones))
+        
         return info
     
+    @staticmethod
+    def _match_text(pattern: re.Pattern, html: bytes) -> str:
+        """Testo del primo match sui byte, '' se assente o non in UTF-8"""
+        match = pattern.search(html)
+        if not match:
+            return ''
+        raw = match.group(match.lastindex)
+        try:
+            return html_lib.unescape(raw.decode('utf-8'))
+        except UnicodeDecodeError:
+            # Charset diverso: lo lascia rilevare a lxml
+            return ''
+    
+    def _parse_page(self, html: bytes) -> _PageInfoTarget:
+        """Estrae i campi utili dall'HTML senza costruire l'albero del documento"""
+        # Title e description via regex; lxml li cerca solo se non trovati
+        title = self._match_text(_TITLE_RE, html)
+        description = self._match_text(_META_DESC_RE, html)
+        try:
+            return etree.fromstring(html, etree.HTMLParser(target=_PageInfoTarget(title, description)))
+        except (etree.LxmlError, ValueError):
+            pass
+        
+        # HTML che lxml non riesce a leggere: fallback su BeautifulSoup
+        soup = BeautifulSoup(html, 'html.parser')
+        page = _PageInfoTarget()
+        title_tag = soup.find('title')
+        if title_tag:
+            page.title = title_tag.get_text()
+        meta_desc = soup.find('meta', attrs={'name': 'description'})
+        if meta_desc:
+            page.description = meta_desc.get('content', '')
+        page.hrefs = [anchor['href'] for anchor in soup.find_all('a', href=True)]
+        page.text_parts = [soup.get_text(' ')]
+        return page
+    
     async def _search_business_registries(self, partita_iva: str) -> Dict[str, Any]:
         """Cerca informazioni nei registri delle imprese"""
         registry_info = {
@@ -245,70 +418,73 @@ class RateLimiter:
     """Gestione rate limiting per API multiple"""
     
     def __init__(self):
-        self.api_calls = {}
         self.rate_limits = {
-            'semrush': {'calls': 0, 'limit': 10, 'window': 60},
-            'serper': {'calls': 0, 'limit': 100, 'window': 60},
-            'openai': {'calls': 0, 'limit': 50, 'window': 60}
+            'semrush': {'limit': 10, 'window': 60},
+            'serper': {'limit': 100, 'window': 60},
+            'openai': {'limit': 50, 'window': 60}
         }
-        self.last_reset = datetime.now()
+        # Finestra scorrevole: timestamp (ns, orologio monotono) delle chiamate per API
+        self.api_calls = {api: deque() for api in self.rate_limits}
+    
+    def _prune(self, api_name: str, now: int) -> deque:
+        """Scarta le chiamate uscite dalla finestra e restituisce quelle rimaste"""
+        calls = self.api_calls[api_name]
+        cutoff = now - self.rate_limits[api_name]['window'] * 1_000_000_000
+        while calls and calls[0] <= cutoff:
+            calls.popleft()
+        return calls
     
     def can_make_call(self, api_name: str) -> bool:
         """Verifica se è possibile fare una chiamata API"""
-        self._reset_counters_if_needed()
-        
         if api_name not in self.rate_limits:
             return True
         
-        current_calls = self.rate_limits[api_name]['calls']
-        limit = self.rate_limits[api_name]['limit']
-        
-        return current_calls < limit
+        calls = self._prune(api_name, time.monotonic_ns())
+        return len(calls) < self.rate_limits[api_name]['limit']
     
     def record_call(self, api_name: str):
         """Registra una chiamata API"""
         if api_name in self.rate_limits:
-            self.rate_limits[api_name]['calls'] += 1
+            self.api_calls[api_name].append(time.monotonic_ns())
     
-    def get_wait_time(self, api_name: str) -> int:
+    def get_wait_time(self, api_name: str) -> float:
         """Restituisce tempo di attesa in secondi"""
-        if self.can_make_call(api_name):
+        if api_name not in self.rate_limits:
             return 0
         
-        if api_name in self.rate_limits:
-            window = self.rate_limits[api_name]['window']
-            elapsed = (datetime.now() - self.last_reset).total_seconds()
-            return max(0, window - elapsed)
-        
-        return 0
-    
-    def _reset_counters_if_needed(self):
-        """Reset contatori se la finestra temporale è scaduta"""
-        now = datetime.now()
-        if (now - self.last_reset).total_seconds() >= 60:  # Reset ogni minuto
-            for api in self.rate_limits:
-                self.rate_limits[api]['calls'] = 0
-            self.last_reset = now
+        now = time.monotonic_ns()
+        calls = self._prune(api_name, now)
+        if len(calls) < self.rate_limits[api_name]['limit']:
+            return 0
+        
+        # Si libera un posto quando la chiamata più vecchia esce dalla finestra
+        window_ns = self.rate_limits[api_name]['window'] * 1_000_000_000
+        return max(0, (calls[0] + window_ns - now) / 1e9)
 
 class CacheManager:
     """Gestione cache per ottimizzare chiamate API"""
     
     def __init__(self, cache_duration_hours: int = 24):
+        # chiave -> (dati, scadenza in ns sull'orologio monotono)
         self.cache = {}
-        self.cache_duration = timedelta(hours=cache_duration_hours)
+        # Heap di (scadenza, chiave): le voci scadute si rimuovono senza scorrere tutta la cache
+        self._expiry = []
+        self.cache_duration_ns = int(cache_duration_hours * 3600 * 1_000_000_000)
     
     def get_cache_key(self, api_name: str, params: Dict[str, Any]) -> str:
         """Genera chiave cache univoca"""
-        # Serializza parametri in modo deterministico
-        params_str = json.dumps(params, sort_keys=True)
-        cache_input = f"{api_name}:{params_str}"
-        return hashlib.md5(cache_input.encode()).hexdigest()
+        # Serializza parametri in modo deterministico (orjson produce già bytes)
+        params_bytes = orjson.dumps(params, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        cache_input = api_name.encode() + b':' + params_bytes
+        if xxhash is not None:
+            return xxhash.xxh3_128(cache_input).hexdigest()
+        return hashlib.blake2b(cache_input, digest_size=16).hexdigest()
     
     def get(self, cache_key: str) -> Optional[Any]:
         """Recupera dati dalla cache se validi"""
         if cache_key in self.cache:
-            cached_data, timestamp = self.cache[cache_key]
-            if datetime.now() - timestamp < self.cache_duration:
+            cached_data, expiry = self.cache[cache_key]
+            if time.monotonic_ns() < expiry:
                 logger.info(f"Cache hit per chiave: {cache_key[:8]}...")
                 return cached_data
             else:
@@ -319,103 +495,86 @@ class CacheManager:
     
     def set(self, cache_key: str, data: Any):
         """Salva dati in cache"""
-        self.cache[cache_key] = (data, datetime.now())
+        expiry = time.monotonic_ns() + self.cache_duration_ns
+        self.cache[cache_key] = (data, expiry)
+        heapq.heappush(self._expiry, (expiry, cache_key))
         logger.info(f"Dati salvati in cache: {cache_key[:8]}...")
     
     def clear_expired(self):
         """Rimuove dati scaduti dalla cache"""
-        now = datetime.now()
-        expired_keys = [
-            key for key, (_, timestamp) in self.cache.items()
-            if now - timestamp >= self.cache_duration
-        ]
-        
-        for key in expired_keys:
-            del self.cache[key]
-        
-        if expired_keys:
-            logger.info(f"Rimossi {len(expired_keys)} elementi scaduti dalla cache")
+        now = time.monotonic_ns()
+        removed = 0
+        
+        while self._expiry and self._expiry[0][0] <= now:
+            expiry, key = heapq.heappop(self._expiry)
+            # La chiave può essere stata riscritta (nuova scadenza) o già rimossa da get
+            entry = self.cache.get(key)
+            if entry is not None and entry[1] == expiry:
+                del self.cache[key]
+                removed += 1
+        
+        if removed:
+            logger.info(f"Rimossi {removed} elementi scaduti dalla cache")
 
-class DataValidator:
-    """Validazione e sanificazione dati"""
-    
-    @staticmethod
-    def validate_partita_iva(piva: str) -> bool:
-        """Valida Partita IVA italiana"""
+@functools.lru_cache(maxsize=4096)
+def validate_partita_iva(piva: str) -> bool:
+    """Valida Partita IVA italiana"""
+    # Caso comune: già 11 cifre ASCII, nessuna normalizzazione
+    if not (len(piva) == 11 and piva.isascii() and piva.isdigit()):
         # Rimuovi spazi e caratteri non numerici
-        piva = re.sub(r'[^\d]', '', piva)
-        
-        # Deve essere esattamente 11 cifre
-        if len(piva) != 11:
-            return False
+        piva = _NON_DIGIT_RE.sub('', piva)
         
-        # Algoritmo di controllo per P.IVA italiana
-        try:
-            # Calcola checksum
-            odd_sum = sum(int(piva[i]) for i in range(0, 10, 2))
-            even_sum = 0
-            
-            for i in range(1, 10, 2):
-                digit = int(piva[i]) * 2
-                even_sum += digit if digit < 10 else digit - 9
-            
-            total = odd_sum + even_sum
-            check_digit = (10 - (total % 10)) % 10
-            
-            return int(piva[10]) == check_digit
-        except (ValueError, IndexError):
+        # Deve essere esattamente 11 cifre ASCII
+        if len(piva) != 11 or not piva.isascii():
             return False
     
-    @staticmethod
-    def validate_domain(domain: str) -> bool:
-        """Valida formato dominio"""
-        domain_pattern = r'^[a-zA-Z0-9][a-zA-Z0-9-]{1,61}[a-zA-Z0-9]\.[a-zA-Z]{2,}
-        return bool(re.match(domain_pattern, domain))
+    # Algoritmo di controllo per P.IVA italiana, sui codici ASCII delle cifre
+    digits = piva.encode('ascii')
+    total = 0
+    for i in range(0, 10, 2):
+        total += digits[i] - 48
+    for i in range(1, 10, 2):
+        total += _PIVA_DOUBLE[digits[i] - 48]
     
-    @staticmethod
-    def validate_url(url: str) -> bool:
-        """Valida URL completo"""
-        try:
-            result = urlparse(url)
-            return all([result.scheme, result.netloc])
-        except Exception:
-            return False
+    return digits[10] - 48 == (10 - total % 10) % 10
+
+@functools.lru_cache(maxsize=4096)
+def validate_domain(domain: str) -> bool:
+    """Valida formato dominio"""
+    return bool(_DOMAIN_RE.match(domain))
+
+@functools.lru_cache(maxsize=4096)
+def validate_url(url: str) -> bool:
+    """Valida URL completo"""
+    try:
+        result = urlparse(url)
+        return all([result.scheme, result.netloc])
+    except Exception:
+        return False
+
+def sanitize_company_name(name: str) -> str:
+    """Sanifica nome azienda per ricerche"""
+    # Rimuovi caratteri speciali pericolosi
+    sanitized = name.translate(_UNSAFE_CHARS)
     
-    @staticmethod
-    def sanitize_company_name(name: str) -> str:
-        """Sanifica nome azienda per ricerche"""
-        # Rimuovi caratteri speciali pericolosi
-        sanitized = re.sub(r'[<>"\'/\\{}();]', '', name)
-        
-        # Normalizza spazi
-        sanitized = re.sub(r'\s+', ' ', sanitized).strip()
-        
-        return sanitized
+    # Normalizza spazi
+    sanitized = _WS_RE.sub(' ', sanitized).strip()
     
-    @staticmethod
-    def extract_numbers(text: str) -> List[float]:
-        """Estrae numeri da testo (per fatturati, dipendenti, etc.)"""
-        # Pattern per numeri con separatori italiani
-        number_patterns = [
-            r'€\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)',  # Euro
-            r'(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)\s*€',  # Euro alla fine
-            r'(\d{1,3}(?:\.\d{3})*)',                 # Numeri con separatori
-            r'(\d+,\d{2})',                           # Decimali
-            r'(\d+)'                                  # Numeri semplici
-        ]
-        
-        numbers = []
-        for pattern in number_patterns:
-            matches = re.findall(pattern, text)
-            for match in matches:
-                try:
-                    # Converti formato italiano in float
-                    clean_number = match.replace('.', '').replace(',', '.')
-                    numbers.append(float(clean_number))
-                except ValueError:
-                    continue
-        
-        return numbers
+    return sanitized
+
+def extract_numbers(text: str) -> List[float]:
+    """Estrae numeri da testo (per fatturati, dipendenti, etc.)"""
+    # Un solo passaggio sul testo, ogni numero estratto una volta
+    return [float(match.translate(_NUMBER_TRANS)) for match in _NUMBER_RE.findall(text)]
+
+class DataValidator:
+    """Validazione e sanificazione dati"""
+
+DataValidator.validate_partita_iva = staticmethod(validate_partita_iva)
+DataValidator.validate_domain = staticmethod(validate_domain)
+DataValidator.validate_url = staticmethod(validate_url)
+DataValidator.sanitize_company_name = staticmethod(sanitize_company_name)
+DataValidator.extract_numbers = staticmethod(extract_numbers)
 
 class ReportFormatter:
     """Formattazione e styling report"""
@@ -548,7 +707,9 @@ class ProgressTracker:
         self.current_step = 0
         self.step_descriptions = {}
         self.start_time = datetime.now()
-        self.step_times = []
+        # Tempi misurati sull'orologio monotono (ns); start_time resta per la visualizzazione
+        self._t0 = time.monotonic_ns()
+        self.step_times = deque()
     
     def update(self, description: str = ""):
         """Aggiorna progresso"""
@@ -557,34 +718,37 @@ class ProgressTracker:
         if description:
             self.step_descriptions[self.current_step] = description
         
-        self.step_times.append(datetime.now())
+        now = time.monotonic_ns()
+        self.step_times.append(now)
         
         progress_percent = (self.current_step / self.total_steps) * 100
-        elapsed = (datetime.now() - self.start_time).total_seconds()
-        
-        # Stima tempo rimanente
-        if self.current_step > 0:
-            avg_step_time = elapsed / self.current_step
-            remaining_steps = self.total_steps - self.current_step
-            eta = remaining_steps * avg_step_time
-            eta_str = f" (ETA: {int(eta//60)}m {int(eta%60)}s)" if eta > 0 else ""
+        elapsed_ns = now - self._t0
+        
+        # Stima tempo rimanente, in aritmetica intera sui nanosecondi
+        remaining_steps = self.total_steps - self.current_step
+        eta_ns = remaining_steps * elapsed_ns // self.current_step
+        if eta_ns > 0:
+            eta_min, eta_sec = divmod(eta_ns // 1_000_000_000, 60)
+            eta_str = f" (ETA: {eta_min}m {eta_sec}s)"
         else:
             eta_str = ""
         
-        logger.info(f"Progresso: {progress_percent:.1f}% - {description}{eta_str}")
+        # Messaggio formattato solo se il livello INFO è attivo
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"Progresso: {progress_percent:.1f}% - {description}{eta_str}")
         
         return {
             'current_step': self.current_step,
             'total_steps': self.total_steps,
             'progress_percent': progress_percent,
             'description': description,
-            'elapsed_seconds': elapsed,
+            'elapsed_seconds': elapsed_ns / 1e9,
             'eta_str': eta_str
         }
     
     def get_summary(self) -> Dict[str, Any]:
         """Ottieni riassunto completo del progresso"""
-        total_time = (datetime.now() - self.start_time).total_seconds()
+        total_time = (time.monotonic_ns() - self._t0) / 1e9
         
         return {
             'total_steps': self.total_steps,
@@ -644,11 +808,13 @@ class DataExporter:
     def to_json(data: Dict[str, Any], filename: str, pretty: bool = True) -> str:
         """Esporta in JSON"""
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                if pretty:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-                else:
-                    json.dump(data, f, ensure_ascii=False)
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            if pretty:
+                option |= orjson.OPT_INDENT_2
+            
+            # orjson scrive direttamente UTF-8
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(data, option=option))
             
             return filename
         except Exception as e:
@@ -735,8 +901,8 @@ def format_timespan(start_date: datetime, end_date: datetime = None) -> str:
 def generate_report_filename(company_name: str, report_type: str = "business_analysis") -> str:
     """Genera nome file per report"""
     # Pulisci nome azienda
-    clean_name = re.sub(r'[^\w\s-]', '', company_name)
-    clean_name = re.sub(r'\s+', '_', clean_name).lower()
+    clean_name = _NONWORD_RE.sub('', company_name)
+    clean_name = _WS_RE.sub('_', clean_name).lower()
     
     # Aggiungi timestamp
     timestamp = datetime.now().strftime("%Y%m%d_%H%M")